@@ -0,0 +1,56 @@
+import orjson
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+# Types orjson does not serialize natively (Decimal, lazy translation strings,
+# querysets, ...) and datetimes, which are formatted as DRF does, go through
+# DRF's encoder.
+_encoder = JSONEncoder()
+ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+
+def default(obj):
+    return _encoder.default(obj)
+
+
+def dumps(data, indent=False):
+    """
+    Serialize to JSON bytes, the same output as DRF's JSONRenderer.
+    """
+    options = ORJSON_OPTIONS | orjson.OPT_INDENT_2 if indent else ORJSON_OPTIONS
+    return orjson.dumps(data, default=default, option=options)
+
+
+def loads(data):
+    return orjson.loads(data)
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer backed by orjson.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        renderer_context = renderer_context or {}
+        return dumps(
+            data, indent=bool(self.get_indent(accepted_media_type, renderer_context))
+        )
+
+
+class ORJSONParser(JSONParser):
+    """
+    JSONParser backed by orjson.
+    """
+
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 from pathlib import Path
 from datetime import timedelta
 import os
+import sys
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -42,6 +43,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     # Modules
     "channels",
     "corsheaders",
@@ -101,6 +103,25 @@ CHANNEL_LAYERS = {
     },
 }
 
+# Shared cache, also used to publish invalidations between worker processes
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.getenv("REDIS_CACHE_URL", "redis://redis:6379/1"),
+    }
+}
+
+# The tests clear the cache, they run against a local memory cache instead of
+# the shared Redis
+if sys.argv[1:2] == ["test"]:
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+# Write-behind queue of the websocket chat messages, see chat.message_queue
+CHAT_MESSAGE_QUEUE_URL = os.getenv("CHAT_MESSAGE_QUEUE_URL", "redis://redis:6379/2")
+
+# Course search backend, see courses/search.py
+COURSE_SEARCH_BACKEND = "courses.search.PostgresSearchBackend"
+
 # Celery settings
 CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL")
 CELERY_RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND")
@@ -113,6 +134,33 @@ CELERY_BEAT_SCHEDULE = {
         "task": "users.tasks.remove_expired_otps",
         "schedule": timedelta(hours=1),  # Runs every hour
     },
+    "process-search-index-outbox": {
+        "task": "courses.tasks.process_search_index_outbox",
+        # Catches up on the changes whose task could not be queued
+        "schedule": timedelta(minutes=1),
+    },
+    "refresh-course-stats": {
+        "task": "courses.tasks.refresh_course_stats",
+        # Moves the 7 and 30 day enrollment windows forward
+        "schedule": timedelta(hours=1),
+    },
+    "refresh-trending-scores": {
+        "task": "courses.tasks.refresh_trending_scores",
+        "schedule": timedelta(minutes=15),
+    },
+    "build-course-similarities": {
+        "task": "courses.tasks.build_course_similarities",
+        "schedule": timedelta(hours=24),
+    },
+    "build-course-interests": {
+        "task": "courses.tasks.build_course_interests",
+        "schedule": timedelta(hours=1),
+    },
+    "flush-chat-messages": {
+        "task": "chat.tasks.flush_chat_messages",
+        # Micro-batches of the messages sent over websockets
+        "schedule": timedelta(seconds=1),
+    },
 }
 
 # Database
@@ -184,6 +232,9 @@ AWS_S3_REGION_NAME = "ap-south-1"
 AWS_S3_SIGNATURE_NAME = "s3v4"
 AWS_S3_CUSTOM_DOMAIN = f"{AWS_STORAGE_BUCKET_NAME}.s3.amazonaws.com"
 AWS_DEFAULT_ACL = None
+# Lifetime in seconds of presigned media URLs, cached responses embedding
+# them must expire sooner (see courses/detail_cache.py)
+AWS_QUERYSTRING_EXPIRE = 3600
 
 # Media Files
 MEDIA_LOCATION = "media"
@@ -258,6 +309,16 @@ REST_FRAMEWORK = {
         "rest_framework_simplejwt.authentication.JWTAuthentication",
         "rest_framework.authentication.SessionAuthentication",
     ],
+    # JSON is rendered and parsed with orjson
+    "DEFAULT_RENDERER_CLASSES": [
+        "backend.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "backend.renderers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
 }
 
 SIMPLE_JWT = {
@@ -1,6 +1,27 @@
+import logging
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+logger = logging.getLogger(__name__)
 
 
 class ChatConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'chat'
+
+    def ready(self):
+        # Key the messages and build the conversations saved before they existed
+        post_migrate.connect(self.backfill_conversation_keys, sender=self)
+
+    def backfill_conversation_keys(self, sender, **kwargs):
+        from .models import backfill_conversation_keys, backfill_conversations
+
+        try:
+            updated = backfill_conversation_keys()
+            if updated:
+                logger.info(f"Set the conversation key of {updated} messages")
+            created = backfill_conversations()
+            if created:
+                logger.info(f"Built the read model of {created} conversations")
+        except Exception as e:
+            logger.error(f"Error backfilling conversations: {str(e)}")
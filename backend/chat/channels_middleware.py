@@ -45,7 +45,8 @@ class JWTAuthMiddleware(BaseMiddleware):
             validated_token = AccessToken(token)
             user_id = validated_token["user_id"]
             try:
-                return User.objects.get(id=user_id)
+                # Blocked and deactivated users cannot connect
+                return User.objects.get(id=user_id, is_active=True, is_blocked=False)
             except User.DoesNotExist:
                 return None
         except Exception:
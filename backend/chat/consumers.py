@@ -1,23 +1,33 @@
-import json
 import logging
 from channels.generic.websocket import AsyncWebsocketConsumer
 from django.contrib.auth import get_user_model
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from asgiref.sync import sync_to_async
+from channels.db import database_sync_to_async
 from channels.exceptions import StopConsumer
-from rest_framework.exceptions import NotFound
+from redis.exceptions import RedisError
 
-from .models import ChatMessage
+from backend.renderers import dumps, loads
+from .message_queue import build_chat_message, chat_message_queue, save_chat_messages
+from .models import get_conversation_key, mark_conversation_read
+from .revocation import RevocableConsumerMixin
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
 
 
-class PersonalChatConsumer(AsyncWebsocketConsumer):
+class PersonalChatConsumer(RevocableConsumerMixin, AsyncWebsocketConsumer):
     """
     WebSocket consumer to handle personal chat between two users.
     Handles connection, message receiving, and broadcasting messages to the group.
+    The other user is resolved once when connecting, the connection is closed
+    by the server if the access of the user is revoked.
     """
 
+    # Messages are written behind through this queue
+    message_queue = chat_message_queue
+
     async def connect(self):
         """
         Handle WebSocket connection. Authenticates the user and connects them
@@ -31,10 +41,15 @@ class PersonalChatConsumer(AsyncWebsocketConsumer):
                 await self.close()
                 return
 
-            # Get the ID of the user to chat with from the URL route
-            chat_with_user = self.scope["url_route"]["kwargs"]["id"]
-            user_ids = sorted([int(request_user.id), int(chat_with_user)])
-            self.room_group_name = f"chat_{user_ids[0]}-{user_ids[1]}"
+            # Get the user to chat with from the URL route
+            self.peer = await self.get_peer(self.scope["url_route"]["kwargs"]["id"])
+            if self.peer is None or self.peer.id == request_user.id:
+                # Close connection if the receiver does not exist or is the user
+                await self.close()
+                return
+            self.room_group_name = (
+                f"chat_{get_conversation_key(request_user.id, self.peer.id)}"
+            )
 
             # Ensure that the channel layer is available
             if not hasattr(self, "channel_layer"):
@@ -43,6 +58,7 @@ class PersonalChatConsumer(AsyncWebsocketConsumer):
 
             # Add the user to the chat room group
             await self.channel_layer.group_add(self.room_group_name, self.channel_name)
+            await self.join_user_group()
             await self.accept()  # Accept the WebSocket connection
 
         except Exception as e:
@@ -54,66 +70,120 @@ class PersonalChatConsumer(AsyncWebsocketConsumer):
         """
         Handle WebSocket disconnection. Removes the user from the chat room group.
         """
-        await self.channel_layer.group_discard(self.room_group_name, self.channel_name)
+        if hasattr(self, "room_group_name"):
+            await self.channel_layer.group_discard(
+                self.room_group_name, self.channel_name
+            )
+        await self.leave_user_group()
 
     async def receive(self, text_data=None, bytes_data=None):
         """
-        Handle incoming messages from the WebSocket. Saves the message to the database
-        and broadcasts it to the chat room group.
+        Handle incoming messages from the WebSocket. Queues the message to be
+        written behind and broadcasts it to the chat room group right away.
+        Read receipts ({"type": "read", "timestamp": ...}) mark the conversation
+        read up to the message with that timestamp.
         """
         try:
-            data = json.loads(text_data)
-            message = data["message"]
-            user = self.scope["user"]
-            sender_id = user.id
-            receiver_id = int(self.scope["url_route"]["kwargs"]["id"])
-
-            # Save the message to the database
-            chat_message = await self.create_chat_message(
-                sender_id, receiver_id, message
-            )
+            data = loads(text_data)
+            if data.get("type") == "read":
+                await self.receive_read(data["timestamp"])
+                return
+
+            message = data.get("message")
+            if not isinstance(message, str):
+                return
+            # Text columns cannot store NUL characters
+            message = message.replace("\x00", "")
+            if not message:
+                return
+
+            sender_id = self.scope["user"].id
+            receiver_id = self.peer.id
+
+            chat_message = build_chat_message(sender_id, receiver_id, message)
+            try:
+                await self.message_queue.push(chat_message)
+            except RedisError as e:
+                # Never broadcast a message which is not stored, write it now
+                logger.error(f"Error queueing chat message: {str(e)}")
+                await self.save_chat_message(chat_message)
 
             # Broadcast the message to the room group
             await self.channel_layer.group_send(
                 self.room_group_name,
                 {
                     "type": "chat_message",
+                    "uuid": chat_message["uuid"],
                     "message": message,
                     "sender_id": sender_id,
                     "receiver_id": receiver_id,
-                    "timestamp": chat_message.timestamp.isoformat(),
+                    "timestamp": chat_message["timestamp"],
                 },
             )
         except Exception as e:
             """Log the error if any issues occur during message reception or processing."""
             logger.error(f"Error in receive: {str(e)}")
 
+    async def receive_read(self, timestamp):
+        """
+        Mark the messages received up to the timestamp as read and broadcast the
+        receipt to the chat room group.
+        """
+        # Messages cannot be read before they are sent
+        up_to = min(parse_datetime(timestamp), timezone.now())
+        reader_id = self.scope["user"].id
+
+        read = await database_sync_to_async(mark_conversation_read)(
+            reader_id, get_conversation_key(reader_id, self.peer.id), up_to
+        )
+        if read is None:
+            return  # Already read up to that message
+
+        await self.channel_layer.group_send(
+            self.room_group_name,
+            {"type": "chat_read", "reader_id": reader_id, "up_to": up_to.isoformat()},
+        )
+
+    async def chat_read(self, event):
+        """
+        Send the read receipt to the WebSocket.
+        """
+        await self.send(
+            text_data=dumps(
+                {
+                    "type": "read",
+                    "reader_id": event["reader_id"],
+                    "up_to": event["up_to"],
+                }
+            ).decode()
+        )
+
     async def chat_message(self, event):
         """
         Send the received chat message to the WebSocket.
         """
         await self.send(
-            text_data=json.dumps(
+            text_data=dumps(
                 {
+                    "uuid": event["uuid"],
                     "message": event["message"],
                     "sender_id": event["sender_id"],
                     "receiver_id": event["receiver_id"],
                     "timestamp": event["timestamp"],
                 }
-            )
+            ).decode()
         )
 
+    @database_sync_to_async
+    def get_peer(self, user_id):
+        """
+        Active user the connection chats with, None if there is no such user.
+        """
+        return User.objects.filter(id=user_id, is_active=True).first()
+
     @sync_to_async
-    def create_chat_message(self, sender_id, receiver_id, message):
+    def save_chat_message(self, chat_message):
         """
-        Create and save a chat message to the database asynchronously.
+        Write a chat message to the database asynchronously.
         """
-        try:
-            sender = User.objects.get(id=sender_id)
-            receiver = User.objects.get(id=receiver_id)
-        except User.DoesNotExist:
-            raise NotFound("User not found")
-        
-        return ChatMessage.objects.create(
-            sender=sender, receiver=receiver, message=message
-        )
+        save_chat_messages([chat_message])
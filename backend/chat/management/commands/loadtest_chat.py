@@ -0,0 +1,151 @@
+import asyncio
+import time
+from collections import defaultdict
+from uuid import uuid4
+from asgiref.sync import async_to_sync
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from redis.exceptions import RedisError
+
+from backend.renderers import dumps, loads
+from chat.consumers import PersonalChatConsumer
+from chat.message_queue import ChatMessageQueue
+from chat.models import ChatMessage, Conversation
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    """
+    Load test of the chat consumer: many rooms exchanging messages
+    concurrently through the configured channel layer and message queue.
+
+    Reports the delivery latency and throughput, then flushes the queue and
+    checks every message was written once, in the order it was sent. The test
+    users, messages and conversations are deleted afterwards.
+
+    Usage: python manage.py loadtest_chat --rooms 200 --messages 50
+    """
+
+    help = "Load test the websocket chat with many concurrent rooms"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rooms", type=int, default=100)
+        parser.add_argument("--messages", type=int, default=20)
+
+    def handle(self, *args, **options):
+        rooms, messages = options["rooms"], options["messages"]
+
+        # Committed, the consumers read the users on their own connections
+        run_id = uuid4().hex[:8]
+        users = User.objects.bulk_create(
+            [
+                User(
+                    email=f"loadtest-{run_id}-{index}@example.com",
+                    username=f"loadtest-{run_id}-{index}",
+                    role="student",
+                )
+                for index in range(rooms * 2)
+            ]
+        )
+        try:
+            self.run(run_id, users, messages)
+        finally:
+            ChatMessage.objects.filter(sender__in=users).delete()
+            Conversation.objects.filter(participants__user__in=users).delete()
+            User.objects.filter(id__in=[user.id for user in users]).delete()
+
+    def run(self, run_id, users, messages):
+        pairs = [(users[index], users[index + 1]) for index in range(0, len(users), 2)]
+
+        # A queue of its own, the periodic flush never sees the test messages
+        queue = ChatMessageQueue(key=f"chat:loadtest:{run_id}")
+        consumer = type(
+            "LoadTestChatConsumer",
+            (PersonalChatConsumer,),
+            {"message_queue": queue},
+        )
+
+        start = time.perf_counter()
+        latencies = async_to_sync(self.run_rooms)(consumer, pairs, messages)
+        elapsed = time.perf_counter() - start
+
+        latencies.sort()
+        total = len(pairs) * messages
+        self.stdout.write(
+            f"{total} messages in {len(pairs)} rooms in {elapsed:.2f}s "
+            f"({total / elapsed:.0f} messages/s)"
+        )
+        self.stdout.write(
+            f"Delivery latency p50 {latencies[len(latencies) // 2] * 1000:.1f} ms, "
+            f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.1f} ms"
+        )
+
+        try:
+            start = time.perf_counter()
+            written = queue.flush(max_batches=total)
+            self.stdout.write(
+                f"Flushed {written} messages in {time.perf_counter() - start:.2f}s"
+            )
+        except RedisError as e:
+            self.stdout.write(
+                f"Message queue unavailable, messages were written inline ({e})"
+            )
+
+        self.check_messages(pairs, messages)
+
+    async def run_rooms(self, consumer, pairs, messages):
+        latencies = await asyncio.gather(
+            *[
+                self.run_room(consumer, sender, receiver, messages)
+                for sender, receiver in pairs
+            ]
+        )
+        return [latency for room in latencies for latency in room]
+
+    async def run_room(self, consumer, sender, receiver, messages):
+        """
+        The sender sends its messages one after another, each is timed until
+        the receiver gets it.
+        """
+        communicators = []
+        for user, peer in ((sender, receiver), (receiver, sender)):
+            communicator = WebsocketCommunicator(
+                consumer.as_asgi(), f"/ws/chat/{peer.id}/"
+            )
+            communicator.scope["user"] = user
+            communicator.scope["url_route"] = {"kwargs": {"id": peer.id}}
+            await communicator.connect()
+            communicators.append(communicator)
+        sending, receiving = communicators
+
+        latencies = []
+        for index in range(messages):
+            start = time.perf_counter()
+            await sending.send_to(text_data=dumps({"message": str(index)}).decode())
+            loads(await receiving.receive_from(timeout=10))
+            latencies.append(time.perf_counter() - start)
+            await sending.receive_from(timeout=10)
+
+        for communicator in communicators:
+            await communicator.disconnect()
+        return latencies
+
+    def check_messages(self, pairs, messages):
+        written = defaultdict(list)
+        for sender_id, message in (
+            ChatMessage.objects.filter(sender__in=[sender for sender, _ in pairs])
+            .order_by("timestamp", "id")
+            .values_list("sender_id", "message")
+        ):
+            written[sender_id].append(message)
+
+        expected = [str(index) for index in range(messages)]
+        failed = [sender for sender, _ in pairs if written[sender.id] != expected]
+        if failed:
+            self.stderr.write(
+                f"{len(failed)} rooms have missing, duplicated or reordered messages"
+            )
+        else:
+            self.stdout.write("Every message was written once and in order")
@@ -0,0 +1,210 @@
+import logging
+import redis
+import redis.asyncio as aioredis
+from redis.exceptions import LockNotOwnedError
+from uuid import uuid4
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DataError, IntegrityError, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from backend.renderers import dumps, loads
+from .models import (
+    ChatMessage,
+    get_conversation_key,
+    get_read_markers,
+    lock_conversations,
+    update_conversations,
+)
+
+User = get_user_model()
+logger = logging.getLogger(__name__)
+
+CHAT_QUEUE_KEY = "chat:messages"
+CHAT_FLUSH_BATCH_SIZE = 500
+CHAT_FLUSH_MAX_BATCHES = 20
+# Well above the time of a full flush, the lock is renewed after each batch
+CHAT_FLUSH_LOCK_TIMEOUT = 5 * 60
+
+# Errors caused by the content of a message, retrying it fails again
+UNWRITABLE_MESSAGE_ERRORS = (DataError, IntegrityError, KeyError, TypeError, ValueError)
+
+# Moves the oldest messages of the queue to the processing list atomically
+CLAIM_BATCH_SCRIPT = """
+local items = redis.call('LRANGE', KEYS[1], 0, ARGV[1] - 1)
+if #items > 0 then
+    redis.call('LTRIM', KEYS[1], #items, -1)
+    redis.call('RPUSH', KEYS[2], unpack(items))
+end
+return items
+"""
+
+
+def build_chat_message(sender_id, receiver_id, message):
+    """
+    Queued form of a chat message, with its id and timestamp generated on
+    receipt so it can be broadcast before it is written.
+    """
+    return {
+        "uuid": str(uuid4()),
+        "sender_id": sender_id,
+        "receiver_id": receiver_id,
+        "message": message,
+        "timestamp": timezone.now().isoformat(),
+    }
+
+
+def save_chat_messages(payloads):
+    """
+    Write queued messages in one bulk insert, in queue order, and record them
+    in the conversations. Messages already written are skipped, so a batch can
+    be saved again after a failure.
+    """
+    user_ids = {payload["sender_id"] for payload in payloads} | {
+        payload["receiver_id"] for payload in payloads
+    }
+
+    conversation_keys = {
+        get_conversation_key(payload["sender_id"], payload["receiver_id"])
+        for payload in payloads
+    }
+
+    with transaction.atomic():
+        # A batch saved by two writers at once is inserted by the first one,
+        # the second sees its messages once the conversations are unlocked
+        lock_conversations(conversation_keys)
+        saved = {
+            str(message_uuid)
+            for message_uuid in ChatMessage.objects.filter(
+                uuid__in=[payload["uuid"] for payload in payloads]
+            ).values_list("uuid", flat=True)
+        }
+        # Users deleted since the message was sent are kept as NULL
+        existing = set(
+            User.objects.filter(id__in=user_ids).values_list("id", flat=True)
+        )
+        # Messages the receiver marked as read before they were written
+        read_markers = get_read_markers(conversation_keys)
+
+        messages = []
+        for payload in payloads:
+            if payload["uuid"] in saved:
+                continue
+            saved.add(payload["uuid"])
+            sender_id, receiver_id = payload["sender_id"], payload["receiver_id"]
+            conversation_key = get_conversation_key(sender_id, receiver_id)
+            timestamp = parse_datetime(payload["timestamp"])
+            read_at = read_markers.get((conversation_key, receiver_id))
+            messages.append(
+                ChatMessage(
+                    uuid=payload["uuid"],
+                    sender_id=sender_id if sender_id in existing else None,
+                    receiver_id=receiver_id if receiver_id in existing else None,
+                    conversation_key=conversation_key,
+                    message=payload["message"],
+                    is_read=read_at is not None and timestamp <= read_at,
+                    timestamp=timestamp,
+                )
+            )
+
+        ChatMessage.objects.bulk_create(messages)
+        update_conversations(messages)
+    return messages
+
+
+class ChatMessageQueue:
+    """
+    Write-behind queue of the websocket chat messages.
+
+    The consumer pushes each message to a Redis list before broadcasting it and
+    flush(), run by a periodic task, writes the list to ChatMessage in batches.
+    A batch stays in a processing list until its transaction is committed, so
+    messages survive a crash of the writer (and of Redis, with append-only
+    persistence) and are written in the order they were received. Messages
+    which cannot be written are moved to a dead letter list.
+    """
+
+    def __init__(self, url=None, key=CHAT_QUEUE_KEY):
+        self.url = url or settings.CHAT_MESSAGE_QUEUE_URL
+        self.key = key
+        # Batch being written, saved again by the next flush if the writer dies
+        self.processing_key = f"{key}:processing"
+        self.lock_key = f"{key}:flush"
+        self.dead_letter_key = f"{key}:dead"
+        self._client = None
+        self._async_client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = redis.Redis.from_url(self.url, socket_timeout=5)
+        return self._client
+
+    @property
+    def async_client(self):
+        if self._async_client is None:
+            self._async_client = aioredis.Redis.from_url(
+                self.url, socket_connect_timeout=1, socket_timeout=1
+            )
+        return self._async_client
+
+    async def push(self, payload):
+        await self.async_client.rpush(self.key, dumps(payload))
+
+    def flush(
+        self, batch_size=CHAT_FLUSH_BATCH_SIZE, max_batches=CHAT_FLUSH_MAX_BATCHES
+    ):
+        """
+        Write the queued messages, returns the number of messages written.
+        Only one flush runs at a time.
+        """
+        lock = self.client.lock(self.lock_key, timeout=CHAT_FLUSH_LOCK_TIMEOUT)
+        if not lock.acquire(blocking=False):
+            return 0
+
+        written = 0
+        try:
+            for _ in range(max_batches):
+                items = self.client.lrange(self.processing_key, 0, -1)
+                if not items:
+                    items = self.client.eval(
+                        CLAIM_BATCH_SCRIPT, 2, self.key, self.processing_key, batch_size
+                    )
+                if not items:
+                    break
+
+                written += self.save_batch(items)
+                self.client.delete(self.processing_key)
+                lock.reacquire()
+        finally:
+            try:
+                lock.release()
+            except LockNotOwnedError:
+                logger.warning("Chat message flush outlived its lock")
+        return written
+
+    def save_batch(self, items):
+        """
+        Write a batch of queued messages. When the batch fails on the content
+        of a message, its messages are written one at a time and the ones which
+        cannot be written are moved to the dead letter list, so one bad message
+        does not hold up the queue. Other errors (the database being down) are
+        raised and the batch is saved again by the next flush.
+        """
+        try:
+            return len(save_chat_messages([loads(item) for item in items]))
+        except UNWRITABLE_MESSAGE_ERRORS as e:
+            logger.error(f"Error writing chat messages, writing one at a time: {e}")
+
+        written = 0
+        for item in items:
+            try:
+                written += len(save_chat_messages([loads(item)]))
+            except UNWRITABLE_MESSAGE_ERRORS as e:
+                logger.error(f"Moving unwritable chat message to dead letters: {e}")
+                self.client.rpush(self.dead_letter_key, item)
+        return written
+
+
+chat_message_queue = ChatMessageQueue()
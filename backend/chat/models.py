@@ -1,11 +1,27 @@
-from django.db import models
+from uuid import uuid4
+from collections import Counter
+from django.db import models, transaction
+from django.db.models import Count, F, Max, Q
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_save
+from django.dispatch import receiver
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 
 # Create your models here.
 
 User = get_user_model()
 
 
+def get_conversation_key(user_id, other_user_id):
+    """
+    Key of the conversation between two users, the same whichever of them
+    sends the message.
+    """
+    user_ids = sorted([int(user_id), int(other_user_id)])
+    return f"{user_ids[0]}-{user_ids[1]}"
+
+
 class ChatMessage(models.Model):
     """
     Model to store individual chat messages between two users.
@@ -17,13 +33,311 @@ class ChatMessage(models.Model):
     receiver = models.ForeignKey(
         User, on_delete=models.SET_NULL, null=True, related_name="received_messages"
     )
+    # Ordered pair of the user ids, kept when one of the users is deleted
+    conversation_key = models.CharField(max_length=50, editable=False, default="")
+    # Generated when the message is received, messages written behind by the
+    # websocket consumer are deduplicated on it
+    uuid = models.UUIDField(unique=True, null=True, editable=False)
     message = models.TextField()
     is_read = models.BooleanField(default=False)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Time the message was received, not the time it was written
+    timestamp = models.DateTimeField(default=timezone.now)
 
     class Meta:
         ordering = ["timestamp"]
         verbose_name_plural = "Messages"
+        indexes = [
+            # History of a conversation is one range scan, newest first
+            models.Index(
+                fields=["conversation_key", "timestamp", "id"],
+                name="chat_conversation_history_idx",
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.uuid is None:
+            self.uuid = uuid4()
+        if not self.conversation_key and self.sender_id and self.receiver_id:
+            self.conversation_key = get_conversation_key(
+                self.sender_id, self.receiver_id
+            )
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.sender} -> {self.receiver}: {self.message[:30]}"
+
+
+def backfill_conversation_keys():
+    """
+    Set the conversation key of the messages saved before it existed, one
+    UPDATE per pair of users.
+    """
+    pairs = (
+        ChatMessage.objects.filter(
+            conversation_key="", sender__isnull=False, receiver__isnull=False
+        )
+        .values_list("sender_id", "receiver_id")
+        .distinct()
+    )
+    updated = 0
+    for sender_id, receiver_id in pairs:
+        updated += ChatMessage.objects.filter(
+            conversation_key="", sender_id=sender_id, receiver_id=receiver_id
+        ).update(conversation_key=get_conversation_key(sender_id, receiver_id))
+    return updated
+
+
+class Conversation(models.Model):
+    """
+    Read model of a conversation between two users, updated as messages are
+    written, with one ConversationParticipant row per user for the inbox.
+    """
+
+    key = models.CharField(max_length=50, unique=True)
+    last_message = models.ForeignKey(
+        ChatMessage, on_delete=models.SET_NULL, null=True, related_name="+"
+    )
+    last_activity = models.DateTimeField(null=True)
+
+    def __str__(self):
+        return f"Conversation {self.key}"
+
+
+class ConversationParticipant(models.Model):
+    """
+    Inbox entry of a user: the conversation, the other participant and the
+    number of messages the user has not read.
+    """
+
+    conversation = models.ForeignKey(
+        Conversation, on_delete=models.CASCADE, related_name="participants"
+    )
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="conversations"
+    )
+    peer = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, related_name="+"
+    )
+    unread_count = models.PositiveIntegerField(default=0)
+    # Messages received up to this time have been read by the user
+    last_read_at = models.DateTimeField(null=True)
+    # Copy of the conversation's last activity, the inbox is sorted on it
+    last_activity = models.DateTimeField(null=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["conversation", "user"], name="unique_conversation_user"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["user", "-last_activity"], name="chat_inbox_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.user} in {self.conversation}"
+
+
+def create_participants(conversations):
+    """
+    Participant rows of new conversations, for the users of the key which
+    still exist.
+    """
+    pairs = {
+        conversation: [int(user_id) for user_id in conversation.key.split("-")]
+        for conversation in conversations
+    }
+    existing = set(
+        User.objects.filter(
+            id__in={user_id for pair in pairs.values() for user_id in pair}
+        ).values_list("id", flat=True)
+    )
+    ConversationParticipant.objects.bulk_create(
+        [
+            ConversationParticipant(
+                conversation=conversation,
+                user_id=user_id,
+                peer_id=peer_id if peer_id in existing else None,
+                last_activity=conversation.last_activity,
+            )
+            for conversation, (first, second) in pairs.items()
+            for user_id, peer_id in ((first, second), (second, first))
+            if user_id in existing
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def update_conversations(messages):
+    """
+    Record newly written messages in the conversation read model: the last
+    message and activity, and the unread count of each receiver.
+    Costs a few queries per conversation however many messages are recorded.
+    """
+    latest = {}
+    unread = Counter()
+    for message in messages:
+        if not message.conversation_key:
+            continue
+        current = latest.get(message.conversation_key)
+        if current is None or (message.timestamp, message.pk) > (
+            current.timestamp,
+            current.pk,
+        ):
+            latest[message.conversation_key] = message
+        if message.receiver_id and not message.is_read:
+            unread[message.conversation_key, message.receiver_id] += 1
+
+    with transaction.atomic():
+        for key, message in latest.items():
+            conversation, created = Conversation.objects.get_or_create(
+                key=key,
+                defaults={"last_message": message, "last_activity": message.timestamp},
+            )
+            if created:
+                create_participants([conversation])
+            else:
+                # Messages flushed out of order must not move the activity back
+                newer = Q(last_activity__lt=message.timestamp) | Q(
+                    last_activity__isnull=True
+                )
+                Conversation.objects.filter(newer, pk=conversation.pk).update(
+                    last_message=message, last_activity=message.timestamp
+                )
+                ConversationParticipant.objects.filter(
+                    newer, conversation=conversation
+                ).update(last_activity=message.timestamp)
+
+        for (key, user_id), count in unread.items():
+            ConversationParticipant.objects.filter(
+                conversation__key=key, user_id=user_id
+            ).update(unread_count=F("unread_count") + count)
+
+
+def lock_conversations(conversation_keys):
+    """
+    Conversations of the keys, created with their participants when missing,
+    locked until the end of the transaction so writers of the same
+    conversations wait for each other.
+    """
+    conversation_keys = set(conversation_keys)
+    missing = conversation_keys - set(
+        Conversation.objects.filter(key__in=conversation_keys).values_list(
+            "key", flat=True
+        )
+    )
+    if missing:
+        Conversation.objects.bulk_create(
+            [Conversation(key=key) for key in missing], ignore_conflicts=True
+        )
+        # Primary keys of bulk created rows are not set on every database
+        create_participants(list(Conversation.objects.filter(key__in=missing)))
+    return list(
+        Conversation.objects.select_for_update().filter(key__in=conversation_keys)
+    )
+
+
+def get_read_markers(conversation_keys):
+    """
+    Time up to which each participant of the conversations has read, keyed by
+    (conversation key, user id). The participant rows are locked until the end
+    of the transaction so messages are not marked read while they are written.
+    """
+    participants = (
+        ConversationParticipant.objects.select_for_update(of=("self",))
+        .filter(conversation__key__in=conversation_keys)
+        .values_list("conversation__key", "user_id", "last_read_at")
+    )
+    return {
+        (key, user_id): last_read_at
+        for key, user_id, last_read_at in participants
+        if last_read_at
+    }
+
+
+def mark_conversation_read(user_id, conversation_key, up_to):
+    """
+    Mark the messages the user received in the conversation up to the given
+    time as read, in one bulk UPDATE, and decrement the unread counter.
+    Returns the number of messages marked as read, None if the conversation was
+    already read up to that time. The conversation is created if no message of
+    it has been written yet.
+    """
+    participants = ConversationParticipant.objects.select_for_update(
+        of=("self",)
+    ).filter(conversation__key=conversation_key, user_id=user_id)
+
+    with transaction.atomic():
+        participant = participants.first()
+        if participant is None:
+            # Read before the first message of the conversation was written,
+            # the marker applies to the queued messages once they are written
+            lock_conversations([conversation_key])
+            participant = participants.first()
+        if participant is None or (
+            participant.last_read_at and participant.last_read_at >= up_to
+        ):
+            return None
+
+        read = ChatMessage.objects.filter(
+            conversation_key=conversation_key,
+            receiver_id=user_id,
+            is_read=False,
+            timestamp__lte=up_to,
+        ).update(is_read=True)
+        ConversationParticipant.objects.filter(pk=participant.pk).update(
+            last_read_at=up_to, unread_count=Greatest(F("unread_count") - read, 0)
+        )
+    return read
+
+
+@receiver(post_save, sender=ChatMessage)
+def record_chat_message(sender, instance, created, **kwargs):
+    """
+    Keep the conversation read model in step with the messages.
+    """
+    if created:
+        update_conversations([instance])
+
+
+def backfill_conversations():
+    """
+    Build the read model of the conversations whose messages were written
+    before it existed.
+    """
+    keys = list(
+        ChatMessage.objects.exclude(conversation_key="")
+        .exclude(conversation_key__in=Conversation.objects.values("key"))
+        .values_list("conversation_key", flat=True)
+        .distinct()
+    )
+    messages = ChatMessage.objects.filter(conversation_key__in=keys)
+    last_message_ids = (
+        messages.values("conversation_key")
+        .annotate(last_id=Max("id"))
+        .values_list("last_id", flat=True)
+    )
+    conversations = Conversation.objects.bulk_create(
+        [
+            Conversation(
+                key=message.conversation_key,
+                last_message=message,
+                last_activity=message.timestamp,
+            )
+            for message in ChatMessage.objects.filter(id__in=list(last_message_ids))
+        ]
+    )
+    # Primary keys of bulk created rows are not set on every database
+    conversations = list(Conversation.objects.filter(key__in=keys))
+    create_participants(conversations)
+
+    unread = (
+        messages.filter(is_read=False, receiver__isnull=False)
+        .values_list("conversation_key", "receiver_id")
+        .annotate(count=Count("id"))
+    )
+    for key, user_id, count in unread:
+        ConversationParticipant.objects.filter(
+            conversation__key=key, user_id=user_id
+        ).update(unread_count=count)
+    return len(conversations)
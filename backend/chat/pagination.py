@@ -0,0 +1,14 @@
+from rest_framework.pagination import CursorPagination
+
+
+class ChatMessageCursorPagination(CursorPagination):
+    """
+    Keyset pagination of a conversation, newest messages first.
+    Each "load older messages" page is a range scan of the conversation index
+    however long the history is.
+    """
+
+    page_size = 30
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    ordering = ("-timestamp", "-id")
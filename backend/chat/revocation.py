@@ -0,0 +1,44 @@
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+
+# Close code sent to the client when its access is revoked
+ACCESS_REVOKED_CLOSE_CODE = 4003
+
+
+def get_user_group_name(user_id):
+    """
+    Group holding every websocket connection of a user.
+    """
+    return f"user_{user_id}"
+
+
+def revoke_connections(group_name):
+    """
+    Close the websocket connections of the group.
+    Consumers resolve the users, courses and entitlements once when connecting,
+    so the server pushes revocations instead of consumers checking on every
+    message.
+    """
+    channel_layer = get_channel_layer()
+    if channel_layer is not None:
+        async_to_sync(channel_layer.group_send)(group_name, {"type": "access_revoked"})
+
+
+class RevocableConsumerMixin:
+    """
+    Keeps the connection in the group of its user and closes it when the
+    server revokes the access.
+    """
+
+    async def join_user_group(self):
+        self.user_group_name = get_user_group_name(self.scope["user"].id)
+        await self.channel_layer.group_add(self.user_group_name, self.channel_name)
+
+    async def leave_user_group(self):
+        if hasattr(self, "user_group_name"):
+            await self.channel_layer.group_discard(
+                self.user_group_name, self.channel_name
+            )
+
+    async def access_revoked(self, event):
+        await self.close(code=ACCESS_REVOKED_CLOSE_CODE)
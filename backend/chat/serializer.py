@@ -1,6 +1,6 @@
 from rest_framework.serializers import ModelSerializer, SerializerMethodField
 
-from .models import ChatMessage
+from .models import ChatMessage, ConversationParticipant
 from users.models import MentorProfile, StudentProfile
 
 
@@ -63,6 +63,7 @@ class ChatMessageSerializer(ModelSerializer):
         model = ChatMessage
         fields = [
             "id",
+            "uuid",
             "message",
             "is_read",
             "timestamp",
@@ -70,3 +71,30 @@ class ChatMessageSerializer(ModelSerializer):
             "receiver",
         ]
         read_only_fields = ["timestamp"]
+
+
+class ConversationSerializer(ModelSerializer):
+    """
+    Serializer for an inbox entry, the profile of the other participant
+    with the summary of the conversation.
+    """
+
+    last_message = ChatMessageSerializer(source="conversation.last_message")
+
+    class Meta:
+        model = ConversationParticipant
+        fields = ["unread_count", "last_activity", "last_message"]
+
+    def to_representation(self, instance):
+        """
+        Returns the profile fields of the other participant (as the chat profile
+        serializers do) merged with the conversation fields.
+        """
+        peer = instance.peer
+        if hasattr(peer, "studentprofile"):
+            profile = StudentProfileSerializer(peer.studentprofile).data
+        elif hasattr(peer, "mentorprofile"):
+            profile = MentorProfileSerializer(peer.mentorprofile).data
+        else:
+            profile = {}
+        return {**profile, **super().to_representation(instance)}
@@ -0,0 +1,17 @@
+from celery import shared_task
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def flush_chat_messages():
+    """
+    Write the chat messages queued by the websocket consumers.
+    """
+    from .message_queue import chat_message_queue
+
+    written = chat_message_queue.flush()
+    if written:
+        logger.info(f"Wrote {written} chat messages")
+    return written
@@ -1,3 +1,456 @@
-from django.test import TestCase
+from io import StringIO
+from uuid import UUID
+from unittest import skipUnless
+import redis
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from channels.testing import WebsocketCommunicator
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+
+from backend.renderers import dumps
+
+from users.models import MentorProfile, StudentProfile
+from .models import (
+    ChatMessage,
+    Conversation,
+    ConversationParticipant,
+    backfill_conversation_keys,
+    backfill_conversations,
+    get_conversation_key,
+    mark_conversation_read,
+)
+from .consumers import PersonalChatConsumer
+from .message_queue import ChatMessageQueue, build_chat_message, save_chat_messages
 
 # Create your tests here.
+
+User = get_user_model()
+
+
+def redis_available():
+    try:
+        return redis.Redis.from_url(
+            settings.CHAT_MESSAGE_QUEUE_URL, socket_connect_timeout=1
+        ).ping()
+    except redis.RedisError:
+        return False
+
+
+class ChatHistoryTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.student = User.objects.create_user(
+            email="student@test.com", password="testpass123", role="student"
+        )
+        self.mentor = User.objects.create_user(
+            email="mentor@test.com", password="testpass123", role="mentor"
+        )
+        self.other = User.objects.create_user(
+            email="other@test.com", password="testpass123", role="student"
+        )
+        self.client.force_authenticate(self.student)
+
+    def test_messages_share_conversation_key(self):
+        """Test that both directions of a conversation have the same key"""
+        sent = ChatMessage.objects.create(
+            sender=self.student, receiver=self.mentor, message="Hi"
+        )
+        received = ChatMessage.objects.create(
+            sender=self.mentor, receiver=self.student, message="Hello"
+        )
+        self.assertEqual(sent.conversation_key, received.conversation_key)
+        self.assertEqual(
+            sent.conversation_key, get_conversation_key(self.mentor.id, self.student.id)
+        )
+
+    def test_history_is_cursor_paginated(self):
+        """Test that older messages are loaded page by page, newest first"""
+        messages = [
+            ChatMessage.objects.create(
+                sender=self.student if index % 2 else self.mentor,
+                receiver=self.mentor if index % 2 else self.student,
+                message=f"Message {index}",
+            )
+            for index in range(5)
+        ]
+        ChatMessage.objects.create(
+            sender=self.other, receiver=self.student, message="Elsewhere"
+        )
+
+        response = self.client.get(
+            "/messages/", {"receiverId": self.mentor.id, "page_size": 3}
+        )
+        self.assertEqual(
+            [message["id"] for message in response.data["results"]],
+            [message.id for message in messages[:1:-1]],
+        )
+
+        with self.assertNumQueries(1):
+            older = self.client.get(response.data["next"])
+        self.assertEqual(
+            [message["id"] for message in older.data["results"]],
+            [message.id for message in messages[1::-1]],
+        )
+        self.assertIsNone(older.data["next"])
+
+    def test_missing_receiver_lists_nothing(self):
+        """Test that a conversation is only listed with a valid receiver"""
+        ChatMessage.objects.create(
+            sender=self.student, receiver=self.mentor, message="Hi"
+        )
+        for params in ({}, {"receiverId": "abc"}):
+            response = self.client.get("/messages/", params)
+            self.assertEqual(response.data["results"], [])
+
+    def test_backfill_conversation_keys(self):
+        """Test that messages saved without a key are keyed per pair of users"""
+        message = ChatMessage.objects.create(
+            sender=self.mentor, receiver=self.student, message="Hi"
+        )
+        ChatMessage.objects.filter(pk=message.pk).update(conversation_key="")
+
+        self.assertEqual(backfill_conversation_keys(), 1)
+        message.refresh_from_db()
+        self.assertEqual(
+            message.conversation_key,
+            get_conversation_key(self.student.id, self.mentor.id),
+        )
+
+
+class ChatInboxTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.student = User.objects.create_user(
+            email="student@test.com", password="testpass123", role="student"
+        )
+        self.mentor = User.objects.create_user(
+            email="mentor@test.com", password="testpass123", role="mentor"
+        )
+        self.other = User.objects.create_user(
+            email="other@test.com", password="testpass123", role="student"
+        )
+        StudentProfile.objects.get_or_create(user=self.student)
+        StudentProfile.objects.get_or_create(user=self.other)
+        MentorProfile.objects.get_or_create(user=self.mentor)
+        self.client.force_authenticate(self.student)
+
+    def test_messages_update_conversation(self):
+        """Test that each message updates the last message and unread counts"""
+        ChatMessage.objects.create(
+            sender=self.student, receiver=self.mentor, message="Hi"
+        )
+        last = ChatMessage.objects.create(
+            sender=self.student, receiver=self.mentor, message="Are you there?"
+        )
+
+        conversation = Conversation.objects.get()
+        self.assertEqual(conversation.last_message, last)
+        unread = dict(conversation.participants.values_list("user_id", "unread_count"))
+        self.assertEqual(unread, {self.student.id: 0, self.mentor.id: 2})
+
+    def test_inbox_sorted_by_recency(self):
+        """Test that the inbox lists the latest conversations first in one query"""
+        ChatMessage.objects.create(
+            sender=self.mentor, receiver=self.student, message="Welcome"
+        )
+        ChatMessage.objects.create(
+            sender=self.other, receiver=self.student, message="Hello"
+        )
+
+        with self.assertNumQueries(1):
+            response = self.client.get("/chat-profiles/")
+        self.assertEqual(
+            [profile["user_id"] for profile in response.data],
+            [self.other.id, self.mentor.id],
+        )
+        self.assertEqual(response.data[0]["unread_count"], 1)
+        self.assertEqual(response.data[0]["last_message"]["message"], "Hello")
+
+    def test_backfill_conversations(self):
+        """Test that conversations are built from the existing messages"""
+        ChatMessage.objects.create(
+            sender=self.mentor, receiver=self.student, message="Welcome"
+        )
+        last = ChatMessage.objects.create(
+            sender=self.student, receiver=self.mentor, message="Thanks"
+        )
+        Conversation.objects.all().delete()
+
+        self.assertEqual(backfill_conversations(), 1)
+        conversation = Conversation.objects.get()
+        self.assertEqual(conversation.last_message, last)
+        self.assertEqual(
+            ConversationParticipant.objects.get(user=self.student).unread_count, 1
+        )
+
+
+class ChatWriteBehindTests(TestCase):
+    def setUp(self):
+        self.student = User.objects.create_user(
+            email="student@test.com", password="testpass123", role="student"
+        )
+        self.mentor = User.objects.create_user(
+            email="mentor@test.com", password="testpass123", role="mentor"
+        )
+
+    def test_save_chat_messages_is_idempotent(self):
+        """Test that a batch saved again writes each message once, in order"""
+        payloads = [
+            build_chat_message(self.student.id, self.mentor.id, f"Message {index}")
+            for index in range(3)
+        ]
+        self.assertEqual(len(save_chat_messages(payloads[:2])), 2)
+        self.assertEqual(len(save_chat_messages(payloads)), 1)
+
+        self.assertEqual(
+            list(ChatMessage.objects.values_list("message", flat=True)),
+            ["Message 0", "Message 1", "Message 2"],
+        )
+        conversation = Conversation.objects.get()
+        self.assertEqual(conversation.last_message.message, "Message 2")
+        self.assertEqual(
+            conversation.participants.get(user=self.mentor).unread_count, 3
+        )
+
+    @skipUnless(redis_available(), "Requires the Redis message queue")
+    def test_queue_flush_writes_messages(self):
+        """Test that queued messages are written by a flush"""
+        queue = ChatMessageQueue(key="chat:test")
+        queue.client.delete(queue.key, queue.processing_key)
+        payloads = [
+            build_chat_message(self.student.id, self.mentor.id, f"Message {index}")
+            for index in range(5)
+        ]
+        for payload in payloads:
+            queue.client.rpush(queue.key, dumps(payload))
+
+        self.assertEqual(queue.flush(batch_size=2), 5)
+        self.assertEqual(
+            list(ChatMessage.objects.values_list("uuid", flat=True)),
+            [UUID(payload["uuid"]) for payload in payloads],
+        )
+        self.assertEqual(queue.client.llen(queue.key), 0)
+
+    @skipUnless(redis_available(), "Requires the Redis message queue")
+    def test_unwritable_message_does_not_block_queue(self):
+        """Test that a message which cannot be written is set aside"""
+        queue = ChatMessageQueue(key="chat:test")
+        queue.client.delete(queue.key, queue.processing_key, queue.dead_letter_key)
+        unwritable = build_chat_message("unknown", self.mentor.id, "Lost")
+        payloads = [
+            build_chat_message(self.student.id, self.mentor.id, "Before"),
+            unwritable,
+            build_chat_message(self.student.id, self.mentor.id, "After"),
+        ]
+        for payload in payloads:
+            queue.client.rpush(queue.key, dumps(payload))
+
+        self.assertEqual(queue.flush(), 2)
+        self.assertEqual(
+            list(ChatMessage.objects.values_list("message", flat=True)),
+            ["Before", "After"],
+        )
+        self.assertEqual(
+            queue.client.lrange(queue.dead_letter_key, 0, -1), [dumps(unwritable)]
+        )
+        self.assertEqual(queue.client.llen(queue.processing_key), 0)
+
+        # Later messages are written by the next flush
+        queue.client.rpush(
+            queue.key,
+            dumps(build_chat_message(self.student.id, self.mentor.id, "Next")),
+        )
+        self.assertEqual(queue.flush(), 1)
+
+
+# The consumers query the database on connections of their own, the load test
+# users must be committed
+class ChatLoadTests(TransactionTestCase):
+    def test_load_test_with_concurrent_rooms(self):
+        """Test that every message of concurrent rooms is delivered and written"""
+        out = StringIO()
+        call_command("loadtest_chat", rooms=10, messages=5, stdout=out)
+        self.assertIn("50 messages in 10 rooms", out.getvalue())
+        self.assertIn("Every message was written once and in order", out.getvalue())
+
+        # The test users and their chats are deleted
+        self.assertFalse(User.objects.exists())
+        self.assertFalse(ChatMessage.objects.exists())
+        self.assertFalse(Conversation.objects.exists())
+
+
+class ChatConsumerTests(TransactionTestCase):
+    def setUp(self):
+        self.student = User.objects.create_user(
+            email="student@test.com", password="testpass123", role="student"
+        )
+        self.mentor = User.objects.create_user(
+            email="mentor@test.com", password="testpass123", role="mentor"
+        )
+
+    def get_communicator(self, user, peer_id):
+        communicator = WebsocketCommunicator(
+            PersonalChatConsumer.as_asgi(), f"/ws/chat/{peer_id}/"
+        )
+        communicator.scope["user"] = user
+        communicator.scope["url_route"] = {"kwargs": {"id": peer_id}}
+        return communicator
+
+    def test_rejects_unknown_peer(self):
+        """Test that a chat with a missing user or oneself is refused"""
+
+        async def connect(peer_id):
+            connected, _ = await self.get_communicator(self.student, peer_id).connect()
+            return connected
+
+        self.assertFalse(async_to_sync(connect)(self.mentor.id + 100))
+        self.assertFalse(async_to_sync(connect)(self.student.id))
+
+    def test_messages_without_text_are_dropped(self):
+        """Test that empty messages and NUL characters are never broadcast"""
+
+        async def scenario():
+            communicator = self.get_communicator(self.student, self.mentor.id)
+            await communicator.connect()
+            for message in (None, "", "\x00", "Hello\x00 there"):
+                await communicator.send_json_to({"message": message})
+            received = await communicator.receive_json_from(timeout=5)
+            self.assertTrue(await communicator.receive_nothing())
+            await communicator.disconnect()
+            return received
+
+        self.assertEqual(async_to_sync(scenario)()["message"], "Hello there")
+
+    def test_blocking_user_closes_connections(self):
+        """Test that the server closes the connections of a blocked user"""
+
+        @database_sync_to_async
+        def block_student():
+            self.student.is_blocked = True
+            self.student.save()
+
+        async def scenario():
+            communicator = self.get_communicator(self.student, self.mentor.id)
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+            await block_student()
+            return await communicator.receive_output(timeout=1)
+
+        self.assertEqual(
+            async_to_sync(scenario)(), {"type": "websocket.close", "code": 4003}
+        )
+
+
+class ChatReadReceiptTests(TransactionTestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.student = User.objects.create_user(
+            email="student@test.com", password="testpass123", role="student"
+        )
+        self.mentor = User.objects.create_user(
+            email="mentor@test.com", password="testpass123", role="mentor"
+        )
+        self.key = get_conversation_key(self.student.id, self.mentor.id)
+        self.messages = [
+            ChatMessage.objects.create(
+                sender=self.mentor, receiver=self.student, message=f"Message {index}"
+            )
+            for index in range(3)
+        ]
+
+    def get_unread_count(self):
+        return ConversationParticipant.objects.get(user=self.student).unread_count
+
+    def test_mark_conversation_read_up_to_message(self):
+        """Test that messages up to the given one are marked read in bulk"""
+        with self.assertNumQueries(5):
+            read = mark_conversation_read(
+                self.student.id, self.key, self.messages[1].timestamp
+            )
+        self.assertEqual(read, 2)
+        self.assertEqual(
+            list(ChatMessage.objects.values_list("is_read", flat=True)),
+            [True, True, False],
+        )
+        self.assertEqual(self.get_unread_count(), 1)
+
+        # Reading up to an earlier message changes nothing
+        self.assertIsNone(
+            mark_conversation_read(
+                self.student.id, self.key, self.messages[0].timestamp
+            )
+        )
+
+    def test_messages_written_after_being_read(self):
+        """Test that queued messages already read are not counted as unread"""
+        payload = build_chat_message(self.mentor.id, self.student.id, "Queued")
+        mark_conversation_read(self.student.id, self.key, timezone.now())
+
+        save_chat_messages([payload])
+        self.assertTrue(ChatMessage.objects.get(uuid=payload["uuid"]).is_read)
+        self.assertEqual(self.get_unread_count(), 0)
+
+    def test_read_before_first_message_is_written(self):
+        """Test that a receipt for a queued first message is kept"""
+        other = User.objects.create_user(
+            email="other@test.com", password="testpass123", role="mentor"
+        )
+        payload = build_chat_message(other.id, self.student.id, "Queued")
+        key = get_conversation_key(other.id, self.student.id)
+        self.assertEqual(
+            mark_conversation_read(self.student.id, key, timezone.now()), 0
+        )
+
+        save_chat_messages([payload])
+        self.assertTrue(ChatMessage.objects.get(uuid=payload["uuid"]).is_read)
+        participant = ConversationParticipant.objects.get(
+            conversation__key=key, user=self.student
+        )
+        self.assertEqual(participant.unread_count, 0)
+        self.assertEqual(participant.conversation.last_message.message, "Queued")
+
+    def test_unread_count_in_one_query(self):
+        """Test that the inbox badge sums the unread counters"""
+        other = User.objects.create_user(
+            email="other@test.com", password="testpass123", role="mentor"
+        )
+        ChatMessage.objects.create(sender=other, receiver=self.student, message="Hi")
+        self.client.force_authenticate(self.student)
+
+        with self.assertNumQueries(1):
+            response = self.client.get("/unread-count/")
+        self.assertEqual(response.data, {"unread_count": 4, "unread_conversations": 2})
+
+    def test_read_receipt_is_broadcast(self):
+        """Test that a read receipt over the websocket reaches the sender"""
+
+        def connect(user, peer):
+            communicator = WebsocketCommunicator(
+                PersonalChatConsumer.as_asgi(), f"/ws/chat/{peer.id}/"
+            )
+            communicator.scope["user"] = user
+            communicator.scope["url_route"] = {"kwargs": {"id": peer.id}}
+            return communicator
+
+        async def scenario():
+            reader = connect(self.student, self.mentor)
+            sender = connect(self.mentor, self.student)
+            await reader.connect()
+            await sender.connect()
+            await reader.send_json_to(
+                {"type": "read", "timestamp": self.messages[2].timestamp.isoformat()}
+            )
+            receipt = await sender.receive_json_from()
+            await reader.disconnect()
+            await sender.disconnect()
+            return receipt
+
+        receipt = async_to_sync(scenario)()
+        self.assertEqual(receipt["type"], "read")
+        self.assertEqual(receipt["reader_id"], self.student.id)
+        self.assertEqual(self.get_unread_count(), 0)
@@ -4,6 +4,7 @@ from .views import (
     ReceiverProfileRetrieveView,
     ChatMessageListView,
     ChatProfileListView,
+    UnreadCountView,
 )
 
 urlpatterns = [
@@ -15,4 +16,5 @@ urlpatterns = [
         name="receiver-profile",
     ),
     path("chat-profiles/", ChatProfileListView.as_view(), name="chat-profile"),
+    path("unread-count/", UnreadCountView.as_view(), name="unread-count"),
 ]
@@ -1,6 +1,6 @@
 from rest_framework.generics import ListAPIView, CreateAPIView, RetrieveAPIView
 from rest_framework.views import APIView
-from django.db.models import Q
+from django.db.models import Count, Q, Sum
 from django.contrib.auth import get_user_model
 from rest_framework.exceptions import ValidationError, NotFound
 from rest_framework.response import Response
@@ -8,10 +8,12 @@ from rest_framework.status import HTTP_200_OK
 
 from .serializer import (
     ChatMessageSerializer,
+    ConversationSerializer,
     StudentProfileSerializer,
     MentorProfileSerializer,
 )
-from .models import ChatMessage
+from .models import ChatMessage, ConversationParticipant, get_conversation_key
+from .pagination import ChatMessageCursorPagination
 from users.models import StudentProfile, MentorProfile
 from .permissions import ChatAccessPermission
 
@@ -24,25 +26,25 @@ class ChatMessageListView(ListAPIView):
     """
     View for lising the messages in the inbox of users.
     * Using custom permission to allow only sender and reciever is accessing messages.
+    * Cursor paginated newest first, the "next" link loads older messages.
     """
 
     permission_classes = [ChatAccessPermission]  # Custom permission
     serializer_class = ChatMessageSerializer
+    pagination_class = ChatMessageCursorPagination
 
     def get_queryset(self):
         user = self.request.user
         receiver_id = self.request.query_params.get("receiverId")
 
-        if not receiver_id:
+        try:
+            conversation_key = get_conversation_key(user.id, receiver_id)
+        except (TypeError, ValueError):
             return ChatMessage.objects.none()  # No other user, return empty queryset
 
-        # Filter the messages between the logged-in user and the other user
-        messages = ChatMessage.objects.filter(
-            Q(sender=user, receiver_id=receiver_id)
-            | Q(sender_id=receiver_id, receiver=user)
-        ).order_by("-timestamp")
-
-        return messages
+        # The conversation key contains the logged-in user, so only the messages
+        # between the two users are listed
+        return ChatMessage.objects.filter(conversation_key=conversation_key)
 
 
 class SendMessageView(CreateAPIView):
@@ -110,35 +112,49 @@ class ReceiverProfileRetrieveView(RetrieveAPIView):
 class ChatProfileListView(APIView):
     """
     View to fetch the profiles of users the requested user has previously chatted with.
+    * Most recent conversations first, read from the conversation read model in one query.
     """
 
     def get(self, request):
         user = request.user
 
-        # Fetch all chat messages where the requested user is either the sender or receiver
-        chat_messages = ChatMessage.objects.filter(Q(sender=user) | Q(receiver=user))
+        # Inbox entries of the user with the profile of the other participant
+        conversations = (
+            ConversationParticipant.objects.filter(
+                Q(peer__studentprofile__isnull=False)
+                | Q(peer__mentorprofile__isnull=False),
+                user=user,
+            )
+            .select_related(
+                "conversation__last_message",
+                "peer__studentprofile",
+                "peer__mentorprofile",
+            )
+            .order_by("-last_activity")
+        )
+
+        profiles = ConversationSerializer(conversations, many=True).data
 
-        # Get the unique set of user IDs (excluding the requested user)
-        chat_user_ids = set()
-        for chat_message in chat_messages:
-            if chat_message.receiver != user:
-                chat_user_ids.add(chat_message.receiver.id)
-            elif chat_message.sender != user:
-                chat_user_ids.add(chat_message.sender.id)
+        return Response(status=HTTP_200_OK, data=profiles)
 
-        # Fetch student and mentor profiles of those users
-        student_profiles = StudentProfile.objects.filter(user_id__in=chat_user_ids)
-        mentor_profiles = MentorProfile.objects.filter(user_id__in=chat_user_ids)
 
-        # Serialize profiles
-        student_profiles_serialized = StudentProfileSerializer(
-            student_profiles, many=True
-        ).data
-        mentor_profiles_serialized = MentorProfileSerializer(
-            mentor_profiles, many=True
-        ).data
+class UnreadCountView(APIView):
+    """
+    View to fetch the number of unread messages of the user for the inbox badge.
+    * Sums the unread counters of the conversations in one query.
+    """
 
-        # Combine the serialized data
-        profiles = student_profiles_serialized + mentor_profiles_serialized
+    permission_classes = [ChatAccessPermission]
 
-        return Response(status=HTTP_200_OK, data=profiles)
+    def get(self, request):
+        unread = ConversationParticipant.objects.filter(
+            user=request.user, unread_count__gt=0
+        ).aggregate(total=Sum("unread_count"), conversations=Count("id"))
+
+        return Response(
+            status=HTTP_200_OK,
+            data={
+                "unread_count": unread["total"] or 0,
+                "unread_conversations": unread["conversations"],
+            },
+        )
@@ -1,23 +1,28 @@
 # comment/consumers.py
 from channels.generic.websocket import AsyncWebsocketConsumer
-import json
 from asgiref.sync import sync_to_async
 from django.contrib.auth import get_user_model
 from rest_framework.exceptions import NotFound
+from channels.db import database_sync_to_async
 from channels.exceptions import StopConsumer
 import logging
 
+from backend.renderers import dumps, loads
 from .models import Comment
-from courses.models import Course
+from courses.entitlements import get_course_entitlement
+from chat.revocation import RevocableConsumerMixin
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
 
 
-class CommentConsumer(AsyncWebsocketConsumer):
+class CommentConsumer(RevocableConsumerMixin, AsyncWebsocketConsumer):
     """
     WebSocket consumer to handle comments for a course.
     Manages connection, message receiving, and broadcasting comments to the group.
+    The course is resolved once when connecting, the connection is closed by the
+    server if the course is deleted, hidden or unapproved, or the access of the
+    user is revoked.
     """
 
     async def connect(self):
@@ -36,13 +41,26 @@ class CommentConsumer(AsyncWebsocketConsumer):
             self.course_id = self.scope["url_route"]["kwargs"]["course_id"]
             self.room_group_name = f"comments_{self.course_id}"
 
+            # Resolve the course and the access of the user once per connection
+            self.entitlement = await database_sync_to_async(get_course_entitlement)(
+                request_user, self.course_id
+            )
+            if self.entitlement is None or not self.entitlement.course.is_published:
+                # Close connection if the course does not exist or is not visible
+                await self.close()
+                return
+
             # Ensure the channel layer is available
             if not hasattr(self, "channel_layer"):
                 await self.close()
                 return
 
+            # Parent comments already found in the course
+            self.parent_comment_ids = set()
+
             # Add the user to the course comment room group
             await self.channel_layer.group_add(self.room_group_name, self.channel_name)
+            await self.join_user_group()
             await self.accept()  # Accept the WebSocket connection
 
         except Exception as e:
@@ -54,7 +72,11 @@ class CommentConsumer(AsyncWebsocketConsumer):
         """
         Handle WebSocket disconnection. Removes the user from the comment room group.
         """
-        await self.channel_layer.group_discard(self.room_group_name, self.channel_name)
+        if hasattr(self, "room_group_name"):
+            await self.channel_layer.group_discard(
+                self.room_group_name, self.channel_name
+            )
+        await self.leave_user_group()
 
     async def receive(self, text_data=None, bytes_data=None):
         """
@@ -62,7 +84,7 @@ class CommentConsumer(AsyncWebsocketConsumer):
         and broadcast it to the course comment group.
         """
         try:
-            data = json.loads(text_data)
+            data = loads(text_data)
             comment_text = data["comment"]
             parent_comment_id = data.get(
                 "parent_comment_id"
@@ -72,9 +94,7 @@ class CommentConsumer(AsyncWebsocketConsumer):
             print("Parent id:", parent_comment_id)
 
             # Save the comment (or reply) to the database
-            comment = await self.create_comment(
-                user.id, self.course_id, comment_text, parent_comment_id
-            )
+            comment = await self.create_comment(user, comment_text, parent_comment_id)
 
             # Broadcast the comment to the room group
             await self.channel_layer.group_send(
@@ -99,7 +119,7 @@ class CommentConsumer(AsyncWebsocketConsumer):
         Send the received comment message to the WebSocket.
         """
         await self.send(
-            text_data=json.dumps(
+            text_data=dumps(
                 {
                     "id": event["id"],
                     "comment": event["comment"],
@@ -109,27 +129,28 @@ class CommentConsumer(AsyncWebsocketConsumer):
                     "timestamp": event["timestamp"],
                     "course_id": event["course_id"],
                 }
-            )
+            ).decode()
         )
 
     @sync_to_async
-    def create_comment(self, user_id, course_id, comment_text, parent_comment_id=None):
+    def create_comment(self, user, comment_text, parent_comment_id=None):
         """
         Create and save a comment (or reply) to the database asynchronously.
+        The user and the course were resolved when connecting, the parent of a
+        reply is looked up once per connection.
         """
-        print("Parent comment id recieved: ", parent_comment_id)
-        try:
-            user = User.objects.get(id=user_id)
-            course = Course.objects.get(id=course_id)
-            parent_comment = None
-
-            # If parent_comment_id is provided, fetch the parent comment
-            if parent_comment_id:
-                parent_comment = Comment.objects.get(id=parent_comment_id)
-        except (User.DoesNotExist, Course.DoesNotExist, Comment.DoesNotExist):
-            raise NotFound("User, Course, or Parent Comment not found")
+        if parent_comment_id and parent_comment_id not in self.parent_comment_ids:
+            # The parent must be a comment of the same course
+            if not Comment.objects.filter(
+                id=parent_comment_id, course=self.entitlement.course
+            ).exists():
+                raise NotFound("Parent Comment not found")
+            self.parent_comment_ids.add(parent_comment_id)
 
         # Create the comment, setting the parent if provided
         return Comment.objects.create(
-            user=user, course=course, comment=comment_text, parent=parent_comment
+            user=user,
+            course=self.entitlement.course,
+            comment=comment_text,
+            parent_id=parent_comment_id or None,
         )
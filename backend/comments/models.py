@@ -1,6 +1,9 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 
+from courses.mixins import bump_resource_version
 from courses.models import Course
 
 # Create your models here.
@@ -85,3 +88,14 @@ class Comment(models.Model):
         if self.parent:
             return self.parent.get_root_parent()  # Recursively find the root parent
         return self  # If no parent, it's the root
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def bump_course_comments_version(sender, instance, **kwargs):
+    """
+    Change the ETag of the comment lists of the course once the write is committed.
+    """
+    transaction.on_commit(
+        lambda: bump_resource_version(f"comments:{instance.course_id}")
+    )
@@ -1,3 +1,141 @@
-from django.test import TestCase
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from channels.testing import WebsocketCommunicator
+from django.test import TestCase, TransactionTestCase
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework.test import APIClient
+
+from courses.models import Course
+from .consumers import CommentConsumer
+from .models import Comment
 
 # Create your tests here.
+
+
+class CommentListConditionalTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.student = get_user_model().objects.create_user(
+            email="student@test.com", password="testpass123", role="student"
+        )
+        self.course = Course.objects.create(
+            title="Django", description="Course", status="approved"
+        )
+        self.comment = Comment.objects.create(
+            user=self.student, course=self.course, comment="First"
+        )
+
+    def test_replies_change_parent_list_etag(self):
+        """Test that a reply changes the ETag of the course comment lists"""
+        url = f"/parent-comments/?course_id={self.course.id}"
+        etag = self.client.get(url)["ETag"]
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(
+                user=self.student,
+                course=self.course,
+                comment="Reply",
+                parent=self.comment,
+            )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0]["replay_count"], 1)
+
+
+class CommentConsumerTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.student = get_user_model().objects.create_user(
+            email="student@test.com", password="testpass123", role="student"
+        )
+        self.course = Course.objects.create(
+            title="Django", description="Course", status="approved"
+        )
+        self.other_course = Course.objects.create(
+            title="React", description="Course", status="approved"
+        )
+
+    def get_communicator(self):
+        communicator = WebsocketCommunicator(
+            CommentConsumer.as_asgi(), f"/ws/comments/course/{self.course.id}/"
+        )
+        communicator.scope["user"] = self.student
+        communicator.scope["url_route"] = {"kwargs": {"course_id": self.course.id}}
+        return communicator
+
+    def test_replies_need_parent_in_course(self):
+        """Test that replies are only saved under comments of the same course"""
+        parent = Comment.objects.create(
+            user=self.student, course=self.course, comment="First"
+        )
+        foreign = Comment.objects.create(
+            user=self.student, course=self.other_course, comment="Elsewhere"
+        )
+
+        async def scenario():
+            communicator = self.get_communicator()
+            await communicator.connect()
+            await communicator.send_json_to(
+                {"comment": "Ignored", "parent_comment_id": foreign.id}
+            )
+            for _ in range(2):
+                await communicator.send_json_to(
+                    {"comment": "Reply", "parent_comment_id": parent.id}
+                )
+                await communicator.receive_json_from()
+            await communicator.disconnect()
+
+        async_to_sync(scenario)()
+        self.assertEqual(parent.replies.count(), 2)
+        self.assertFalse(foreign.replies.exists())
+
+    def test_rejects_unpublished_course(self):
+        """Test that the comments of a hidden or unapproved course are refused"""
+
+        async def connect():
+            connected, _ = await self.get_communicator().connect()
+            return connected
+
+        for status, is_deleted in (("approved", True), ("pending", False)):
+            self.course = Course.objects.create(
+                title="Django",
+                description="Course",
+                status=status,
+                is_deleted=is_deleted,
+            )
+            self.assertFalse(async_to_sync(connect)())
+
+    def test_unpublishing_course_closes_connections(self):
+        """Test that the server closes the comment sockets of a removed course"""
+
+        def hide(course):
+            course.is_deleted = True
+            course.save()
+
+        def reject(course):
+            course.status = "rejected"
+            course.save()
+
+        for unpublish in (hide, reject, Course.delete):
+            with self.subTest(unpublish.__name__):
+                self.course = Course.objects.create(
+                    title="Django", description="Course", status="approved"
+                )
+
+                async def scenario():
+                    communicator = self.get_communicator()
+                    connected, _ = await communicator.connect()
+                    self.assertTrue(connected)
+                    await database_sync_to_async(unpublish)(self.course)
+                    return await communicator.receive_output(timeout=1)
+
+                self.assertEqual(
+                    async_to_sync(scenario)(),
+                    {"type": "websocket.close", "code": 4003},
+                )
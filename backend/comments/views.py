@@ -8,6 +8,7 @@ from django.shortcuts import get_object_or_404
 from rest_framework.response import Response
 from rest_framework.status import HTTP_200_OK
 
+from courses.mixins import ConditionalListMixin, get_course_resource_version
 from .serializers import CommentSerializer
 from .models import Comment
 
@@ -16,7 +17,17 @@ from .models import Comment
 User = get_user_model()
 
 
-class CommentsViewSet(ModelViewSet):
+class CourseCommentsVersionMixin(ConditionalListMixin):
+    """
+    Comment lists are revalidated against the version of the comments of the course.
+    """
+
+    def get_version(self, request):
+        course_id = request.query_params.get("course_id")
+        return get_course_resource_version("comments", course_id)
+
+
+class CommentsViewSet(CourseCommentsVersionMixin, ModelViewSet):
     """
     Viewset for listing, retrieving, creating and updating Comments
     Only students are able to create comments.
@@ -30,7 +41,7 @@ class CommentsViewSet(ModelViewSet):
         return Comment.objects.filter(course_id=course_id)
 
 
-class ParentOrReplayCommentsListView(ListAPIView):
+class ParentOrReplayCommentsListView(CourseCommentsVersionMixin, ListAPIView):
     """
     View for listing the parent comments or Replay comments.
     Initially in the comment box only parent comments are listed.
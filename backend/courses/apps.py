@@ -1,6 +1,47 @@
+import logging
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+logger = logging.getLogger(__name__)
 
 
 class CoursesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'courses'
+
+    def ready(self):
+        # Backfill the denormalized category tree fields after migrations
+        post_migrate.connect(self.refresh_category_tree, sender=self)
+        # Index the courses which are missing from the search index
+        post_migrate.connect(self.index_courses, sender=self)
+        # Fill in the popularity stats of the courses
+        post_migrate.connect(self.refresh_course_stats, sender=self)
+
+    def refresh_category_tree(self, sender, **kwargs):
+        from .models import refresh_category_tree
+
+        try:
+            updated = refresh_category_tree()
+            if updated:
+                logger.info(f"Refreshed tree fields of {updated} categories")
+        except Exception as e:
+            logger.error(f"Error refreshing category tree: {str(e)}")
+
+    def index_courses(self, sender, **kwargs):
+        from .models import Course
+        from .search import get_search_backend
+
+        try:
+            get_search_backend().update_courses(
+                Course.objects.filter(search_vector__isnull=True).values("pk")
+            )
+        except Exception as e:
+            logger.error(f"Error indexing courses: {str(e)}")
+
+    def refresh_course_stats(self, sender, **kwargs):
+        from .tasks import refresh_course_stats
+
+        try:
+            refresh_course_stats()
+        except Exception as e:
+            logger.error(f"Error refreshing course stats: {str(e)}")
@@ -0,0 +1,130 @@
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from uuid import uuid4
+from django.core.cache import cache
+
+# Shared key holding the current version of the category tree. Every write to a
+# category stores a new version, which makes the other workers rebuild their tree.
+CATEGORY_TREE_VERSION_KEY = "courses:category_tree_version"
+
+
+@dataclass
+class CategoryNode:
+    """
+    Read only copy of a category kept in the process-local tree.
+    """
+
+    id: int
+    name: str
+    description: str
+    parent_id: int | None
+    is_active: bool
+    is_active_chain: bool
+    full_path: str
+    depth: int
+    updated_at: datetime
+    children: list = field(default_factory=list)
+
+
+class CategoryTree:
+    """
+    In-memory category tree built from a single flat query.
+    """
+
+    def __init__(self, nodes, version=None):
+        self.version = version
+        self.nodes = {node.id: node for node in nodes}
+        self.by_name = {node.name: node for node in nodes}
+        self.roots = []
+
+        for node in sorted(nodes, key=lambda node: node.id):
+            parent = self.nodes.get(node.parent_id)
+            if parent:
+                parent.children.append(node)
+            else:
+                self.roots.append(node)
+
+    @classmethod
+    def build(cls, version=None):
+        from .models import Category
+
+        fields = [field.name for field in CategoryNode.__dataclass_fields__.values()]
+        fields.remove("children")
+        nodes = [CategoryNode(**row) for row in Category.objects.values(*fields)]
+        return cls(nodes, version)
+
+    def get(self, pk):
+        return self.nodes.get(pk)
+
+    def get_by_name(self, name):
+        return self.by_name.get(name)
+
+    def get_subtree_ids(self, pk):
+        """
+        Ids of the category and all of its descendants.
+        """
+        ids = []
+        stack = [self.nodes[pk]] if pk in self.nodes else []
+        while stack:
+            node = stack.pop()
+            ids.append(node.id)
+            stack.extend(node.children)
+        return ids
+
+    @property
+    def last_modified(self):
+        return max((node.updated_at for node in self.nodes.values()), default=None)
+
+    def to_nested(self, nodes=None):
+        """
+        Nested representation of the whole tree, children at any depth.
+        """
+        return [
+            {
+                "id": node.id,
+                "name": node.name,
+                "description": node.description,
+                "is_active": node.is_active,
+                "depth": node.depth,
+                "children": self.to_nested(node.children),
+            }
+            for node in (self.roots if nodes is None else nodes)
+        ]
+
+
+class CategoryTreeCache:
+    """
+    Versioned category tree kept in memory by each worker process.
+
+    The version lives in the shared cache (Redis in production, the local memory
+    cache in tests). Reading the tree costs one cache lookup and no database query
+    unless another process has published a new version since the last build.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._tree = None
+
+    def get(self):
+        version = cache.get_or_set(
+            CATEGORY_TREE_VERSION_KEY, lambda: uuid4().hex, timeout=None
+        )
+
+        with self._lock:
+            if self._tree is None or self._version != version:
+                self._tree = CategoryTree.build(version)
+                self._version = version
+            return self._tree
+
+    def invalidate(self):
+        """
+        Publish a new version so that every worker rebuilds its tree.
+        """
+        cache.set(CATEGORY_TREE_VERSION_KEY, uuid4().hex, timeout=None)
+        with self._lock:
+            self._tree = None
+
+
+category_tree = CategoryTreeCache()
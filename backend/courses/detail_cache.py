@@ -0,0 +1,41 @@
+import hashlib
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.settings import api_settings
+
+# The rendered page embeds media URLs, which may be presigned. Entries expire
+# at half the lifetime of the signatures so cached links always work.
+COURSE_DETAIL_TIMEOUT = min(24 * 60 * 60, settings.AWS_QUERYSTRING_EXPIRE // 2)
+
+
+class CourseDetailCache:
+    """
+    Pre-rendered JSON of the public course detail page.
+
+    Each course has one cache entry holding the rendered body and its ETag.
+    Media URLs are rendered from the absolute MEDIA_URL, so the body does not
+    depend on the request host. The entry is dropped by the signals in
+    models.py whenever the course or anything it renders is written.
+    """
+
+    def get_key(self, course_id):
+        return f"courses:detail:{course_id}"
+
+    def get(self, course_id):
+        """
+        (content, etag) of the rendered course, None on a miss.
+        """
+        return cache.get(self.get_key(course_id))
+
+    def set(self, course_id, data):
+        # Rendered with the configured JSON renderer
+        content = api_settings.DEFAULT_RENDERER_CLASSES[0]().render(data)
+        rendered = (content, f'"{hashlib.md5(content).hexdigest()}"')
+        cache.set(self.get_key(course_id), rendered, timeout=COURSE_DETAIL_TIMEOUT)
+        return rendered
+
+    def invalidate(self, course_ids):
+        cache.delete_many([self.get_key(course_id) for course_id in course_ids])
+
+
+course_details = CourseDetailCache()
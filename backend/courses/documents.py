@@ -1,3 +1,8 @@
+# Elasticsearch documents, currently disabled.
+# To revive them, implement courses.search.BaseSearchBackend with CourseDocument
+# and point the COURSE_SEARCH_BACKEND setting to it. Index updates then go through
+# the search index outbox (courses.tasks), the signal handlers below are not needed.
+
 # from django_elasticsearch_dsl import Document, Index, fields
 # from django_elasticsearch_dsl.registries import registry
 # from django.db.models.signals import post_save, post_delete
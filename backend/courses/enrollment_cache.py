@@ -0,0 +1,53 @@
+from django.core.cache import cache
+
+ENROLLED_COURSES_TIMEOUT = 60 * 60
+
+
+class EnrolledCoursesCache:
+    """
+    Ids of the courses each user is enrolled in, kept in the shared cache.
+
+    The set is loaded with one query on a miss and dropped whenever an enrollment
+    of the user is written, so every exclusion filter and purchase check of a
+    request is served by a single cache lookup. The set is also remembered on the
+    user object, which lives as long as the request.
+    """
+
+    def get_key(self, user_id):
+        return f"courses:enrolled:{user_id}"
+
+    def get(self, user):
+        """
+        Frozen set of the ids of the courses the user is enrolled in,
+        empty for anonymous users.
+        """
+        if not user.is_authenticated:
+            return frozenset()
+
+        course_ids = getattr(user, "_enrolled_course_ids", None)
+        if course_ids is None:
+            course_ids = cache.get_or_set(
+                self.get_key(user.pk),
+                lambda: self.build(user.pk),
+                timeout=ENROLLED_COURSES_TIMEOUT,
+            )
+            user._enrolled_course_ids = course_ids
+        return course_ids
+
+    def build(self, user_id):
+        from .models import Enrollment
+
+        return frozenset(
+            Enrollment.objects.filter(
+                user_id=user_id, course__isnull=False
+            ).values_list("course_id", flat=True)
+        )
+
+    def is_enrolled(self, user, course_id):
+        return course_id in self.get(user)
+
+    def invalidate(self, user_id):
+        cache.delete(self.get_key(user_id))
+
+
+enrolled_courses = EnrolledCoursesCache()
@@ -0,0 +1,44 @@
+from .enrollment_cache import enrolled_courses
+
+
+class CourseEntitlement:
+    """
+    Access rights of a user to a course, resolved once.
+    """
+
+    def __init__(self, user, course):
+        self.user = user
+        self.course = course
+        self.is_admin = user.is_superuser
+        self.is_mentor = course.mentor_id == user.pk
+        self.is_enrolled = enrolled_courses.is_enrolled(user, course.pk)
+
+    @property
+    def can_access_lessons(self):
+        return self.is_admin or self.is_mentor or self.is_enrolled
+
+
+def get_course_entitlement(user, course_id):
+    """
+    Entitlement of an authenticated user to the course, None if the course
+    does not exist.
+
+    Entitlements are memoized on the user object, which lives as long as the
+    request (or the websocket connection), so the views, permissions and
+    consumers share a single course lookup.
+    """
+    from .models import Course
+
+    entitlements = getattr(user, "_course_entitlements", None)
+    if entitlements is None:
+        entitlements = user._course_entitlements = {}
+
+    try:
+        course_id = int(course_id)
+    except (TypeError, ValueError):
+        return None
+
+    if course_id not in entitlements:
+        course = Course.objects.filter(pk=course_id).first()
+        entitlements[course_id] = CourseEntitlement(user, course) if course else None
+    return entitlements[course_id]
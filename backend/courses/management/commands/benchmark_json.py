@@ -0,0 +1,79 @@
+import timeit
+from datetime import timedelta
+from decimal import Decimal
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework.renderers import JSONRenderer
+
+from backend.renderers import ORJSONRenderer, loads
+
+
+class Command(BaseCommand):
+    """
+    Compare the CPU time spent rendering a large course list with DRF's
+    JSONRenderer and with the orjson renderer.
+
+    Usage: python manage.py benchmark_json --courses 5000 --repeat 20
+    """
+
+    help = "Benchmark JSON rendering of course lists"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--courses", type=int, default=2000)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def get_course_list(self, count):
+        """
+        Paginated course list shaped like CourseListCreateSerializer output,
+        with raw Decimals, datetimes and lazy strings for the encoder fallbacks.
+        """
+        now = timezone.now()
+        results = [
+            {
+                "id": index,
+                "title": f"Course {index}",
+                "description": "Learn to build web applications. " * 10,
+                "preview_image": f"https://example.com/media/course_preview/{index}.jpg",
+                "category": index % 20,
+                "category_path": "Development > Web > Backend",
+                "mentor": index % 50,
+                "status": _("Approved"),
+                "lessons": [
+                    {"id": index * 10 + lesson, "title": f"Lesson {lesson}"}
+                    for lesson in range(8)
+                ],
+                "requirements": {"id": index, "description": "Basic Python"},
+                "price": {"id": index, "amount": Decimal("499.00")},
+                "mentor_name": "Jane Doe",
+                "created_at": now - timedelta(minutes=index),
+            }
+            for index in range(count)
+        ]
+        return {"count": count, "next": None, "previous": None, "results": results}
+
+    def handle(self, *args, **options):
+        data = self.get_course_list(options["courses"])
+        repeat = options["repeat"]
+
+        renderers = {"JSONRenderer": JSONRenderer(), "ORJSONRenderer": ORJSONRenderer()}
+        outputs = {name: renderer.render(data) for name, renderer in renderers.items()}
+        if loads(outputs["JSONRenderer"]) != loads(outputs["ORJSONRenderer"]):
+            self.stderr.write("The renderers produce different documents.")
+            return
+
+        timings = {}
+        for name, renderer in renderers.items():
+            seconds = min(
+                timeit.repeat(lambda: renderer.render(data), number=1, repeat=repeat)
+            )
+            timings[name] = seconds
+            self.stdout.write(
+                f"{name:<16} {seconds * 1000:8.2f} ms per render "
+                f"({len(outputs[name]) / 1024:.0f} KiB)"
+            )
+
+        self.stdout.write(
+            f"orjson renders {options['courses']} courses "
+            f"{timings['JSONRenderer'] / timings['ORJSONRenderer']:.1f}x faster"
+        )
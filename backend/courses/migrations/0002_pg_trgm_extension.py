@@ -0,0 +1,16 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Enable pg_trgm, needed by the trigram index on the course title.
+    """
+
+    dependencies = [
+        ("courses", "0001_initial"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+    ]
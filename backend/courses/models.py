@@ -1,10 +1,23 @@
+import logging
+from collections import defaultdict
 from decimal import Decimal
-from django.db import models
+from django.db import models, transaction
 from django.core.validators import MinValueValidator, FileExtensionValidator
 from django.conf import settings
-from django.db.models.signals import pre_save
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db.models.functions import Coalesce
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
 from django.dispatch import receiver
 
+from .category_cache import category_tree
+from .detail_cache import course_details
+from .enrollment_cache import enrolled_courses
+from .pagination import COURSE_LISTING_ORDER
+from .popularity import popular_courses
+
+logger = logging.getLogger(__name__)
+
 # Create your models here.
 
 
@@ -24,6 +37,18 @@ class Category(models.Model):
         related_name="subcategories",
     )
     is_active = models.BooleanField(default=True)
+    # Denormalized tree fields, maintained by the signals below and never edited
+    # directly. Materialized path of ancestor ids (e.g. "1/4/" for a category
+    # under 4 under 1).
+    ancestry = models.CharField(
+        max_length=255, blank=True, default="", db_index=True, editable=False
+    )
+    # True only when the category and all of its ancestors are active.
+    is_active_chain = models.BooleanField(default=True, db_index=True, editable=False)
+    # Names from the root category down to this one (e.g. "Parent > Subcategory").
+    full_path = models.TextField(blank=True, default="", editable=False)
+    # Number of ancestors, 0 for parent categories.
+    depth = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -35,21 +60,170 @@ class Category(models.Model):
         return self.name
 
     def get_full_path(self):
-        # Recursively get the full path of the category (e.g., "Parent > Subcategory > ...")
-        if self.parent:
-            return f"{self.parent.get_full_path()} > {self.name}"
-        return self.name
+        # Full path of the category (e.g., "Parent > Subcategory > ..."), stored on save
+        return self.full_path
+
+    def get_subtree(self):
+        """
+        Queryset of the category and all of its descendants.
+        Resolved with a single prefix match on the materialized path.
+        """
+        return Category.objects.filter(
+            models.Q(pk=self.pk)
+            | models.Q(ancestry__startswith=f"{self.ancestry}{self.pk}/")
+        )
 
     def is_active_recursive(self):
         """
         Check if the category and all its parent categories are active.
+        Reads the denormalized flag, so no parent is loaded.
+        """
+        return self.is_active_chain
+
+
+CATEGORY_TREE_FIELDS = ["ancestry", "is_active_chain", "full_path", "depth"]
+
+
+def get_category_tree_fields(category, parent):
+    """
+    Values of the denormalized tree fields of a category given its parent
+    (None for parent categories), in the order of CATEGORY_TREE_FIELDS.
+    """
+    if parent is None:
+        return ("", category.is_active, category.name, 0)
+    return (
+        f"{parent.ancestry}{parent.pk}/",
+        category.is_active and parent.is_active_chain,
+        f"{parent.full_path} > {category.name}",
+        parent.depth + 1,
+    )
+
+
+def refresh_category_tree(root=None):
+    """
+    Recompute the denormalized tree fields for the descendants of the given
+    category, or for every category if no root is given.
+    Costs one SELECT and one bulk UPDATE regardless of the depth of the tree.
+    """
+    categories = list(
+        Category.objects.only(
+            "id", "parent_id", "name", "is_active", *CATEGORY_TREE_FIELDS
+        )
+    )
+    children = defaultdict(list)
+    for category in categories:
+        children[category.parent_id].append(category)
+
+    if root is None:
+        stack = [(category, None) for category in children[None]]
+    else:
+        stack = [(category, root) for category in children[root.pk]]
+
+    changed = []
+    visited = set()
+    while stack:
+        category, parent = stack.pop()
+        if category.pk in visited:
+            continue  # Guard against a category being made its own ancestor
+        visited.add(category.pk)
+
+        values = get_category_tree_fields(category, parent)
+        if tuple(getattr(category, field) for field in CATEGORY_TREE_FIELDS) != values:
+            for field, value in zip(CATEGORY_TREE_FIELDS, values):
+                setattr(category, field, value)
+            changed.append(category)
+
+        stack.extend((child, category) for child in children[category.pk])
+
+    Category.objects.bulk_update(changed, CATEGORY_TREE_FIELDS)
+    return len(changed)
+
+
+@receiver(pre_save, sender=Category)
+def set_category_tree_fields(sender, instance, raw=False, **kwargs):
+    """
+    Derive the materialized path, active chain flag, full path and depth
+    from the parent category.
+    """
+    if raw:
+        return
+
+    parent = None
+    if instance.parent_id:
+        parent = Category.objects.only(*CATEGORY_TREE_FIELDS).get(pk=instance.parent_id)
+
+    for field, value in zip(
+        CATEGORY_TREE_FIELDS, get_category_tree_fields(instance, parent)
+    ):
+        setattr(instance, field, value)
+
+    # Remember the stored state, the subtree is only refreshed if it changed.
+    instance._previous_tree_fields = (
+        Category.objects.filter(pk=instance.pk)
+        .values_list(*CATEGORY_TREE_FIELDS)
+        .first()
+        if instance.pk
+        else None
+    )
+
+
+@receiver(post_save, sender=Category)
+def refresh_subcategory_tree_fields(sender, instance, created, raw=False, **kwargs):
+    """
+    Cascade a rename, re-parent or (de)activation to the whole subtree in bulk.
+    Deleting a category cascades to its subcategories, so no refresh is needed there.
+    """
+    if raw or created:
+        return
+
+    previous = getattr(instance, "_previous_tree_fields", None)
+    if previous != tuple(getattr(instance, field) for field in CATEGORY_TREE_FIELDS):
+        refresh_category_tree(root=instance)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_tree(sender, instance, **kwargs):
+    """
+    Make every worker rebuild its cached category tree once the write is committed.
+    """
+    transaction.on_commit(category_tree.invalidate)
+
+
+class CourseQuerySet(models.QuerySet):
+    """
+    Reusable filters for course listings.
+    """
+
+    def approved(self):
+        # Approved courses which are not deleted.
+        return self.filter(status="approved", is_deleted=False)
+
+    def in_active_category(self):
+        # Courses whose category and all of its ancestors are active.
+        return self.filter(category__is_active_chain=True)
+
+    def order_by_interest(self, interest_area_ids):
+        """
+        Most relevant courses to the given interest areas first.
+        The relevance is the dot product of the course interest vector and the
+        (binary) interest vector of the user, computed in the same query.
         """
-        current_category = self
-        while current_category:
-            if not current_category.is_active:
-                return False
-            current_category = current_category.parent
-        return True
+        relevance = (
+            CourseInterest.objects.filter(
+                course=models.OuterRef("pk"), interest_area__in=interest_area_ids
+            )
+            .values("course")
+            .annotate(total=models.Sum("weight"))
+            .values("total")
+        )
+        return self.annotate(
+            relevance=Coalesce(models.Subquery(relevance), 0.0)
+        ).order_by("-relevance", *COURSE_LISTING_ORDER)
+
+    def for_listing(self):
+        # Join the relations rendered by the listing serializer in the same query.
+        return self.select_related("mentor", "category", "price").defer("search_vector")
 
 
 class Course(models.Model):
@@ -80,10 +254,112 @@ class Course(models.Model):
     is_deleted = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Full text search document, maintained by the search backend.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = CourseQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=["search_vector"], name="course_search_vector_idx"),
+            # Trigram index for title suggestions (pg_trgm, see migration 0002)
+            GinIndex(
+                fields=["title"],
+                opclasses=["gin_trgm_ops"],
+                name="course_title_trgm_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
+    @property
+    def is_published(self):
+        """
+        Visible to the students, see CourseQuerySet.approved().
+        """
+        return self.status == "approved" and not self.is_deleted
+
+
+class SearchIndexOutbox(models.Model):
+    """
+    Courses whose search index entry is out of date.
+    Rows are written in the same transaction as the course or category change
+    and drained in batches by the process_search_index_outbox task.
+    """
+
+    # Plain id instead of a foreign key, deleted courses must be removed from the index.
+    course_id = models.BigIntegerField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Reindex course {self.course_id}"
+
+
+def enqueue_search_index_update(course_ids):
+    """
+    Record the courses to reindex and wake up the indexing task after commit.
+    """
+    SearchIndexOutbox.objects.bulk_create(
+        [SearchIndexOutbox(course_id=course_id) for course_id in course_ids]
+    )
+    transaction.on_commit(schedule_search_index_outbox)
+
+
+def schedule_search_index_outbox():
+    from .tasks import process_search_index_outbox
+
+    try:
+        process_search_index_outbox.delay()
+    except Exception as e:
+        # The periodic run picks the rows up if the broker is unavailable.
+        logger.error(f"Error scheduling search index update: {str(e)}")
+
+
+@receiver(post_save, sender=Course)
+def update_course_search_index(sender, instance, raw=False, **kwargs):
+    """
+    Queue the saved course for reindexing.
+    """
+    if raw:
+        return
+    enqueue_search_index_update([instance.pk])
+
+
+@receiver(post_delete, sender=Course)
+def remove_course_search_index(sender, instance, **kwargs):
+    enqueue_search_index_update([instance.pk])
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def revoke_course_comment_connections(sender, instance, signal, raw=False, **kwargs):
+    """
+    Close the comment websockets of a course which is deleted, hidden or no
+    longer approved, once the write is committed.
+    """
+    if raw or (signal is post_save and instance.is_published):
+        return
+
+    from chat.revocation import revoke_connections
+
+    group_name = f"comments_{instance.pk}"
+    transaction.on_commit(lambda: revoke_connections(group_name))
+
+
+@receiver(post_save, sender=Category)
+def update_category_courses_search_index(
+    sender, instance, created, raw=False, **kwargs
+):
+    """
+    Category name and description are part of the indexed course document.
+    """
+    if raw or created:
+        return
+    enqueue_search_index_update(
+        Course.objects.filter(category=instance).values_list("pk", flat=True)
+    )
+
 
 class Lesson(models.Model):
     """
@@ -217,3 +493,170 @@ class Enrollment(models.Model):
     def is_completed(self):
         # Logic to implement couse completion (For later use)
         pass
+
+
+@receiver(post_save, sender=Enrollment)
+@receiver(post_delete, sender=Enrollment)
+def invalidate_enrolled_courses(sender, instance, **kwargs):
+    """
+    Drop the cached enrolled course ids of the user once the write is committed.
+    """
+    if instance.user_id:
+        transaction.on_commit(lambda: enrolled_courses.invalidate(instance.user_id))
+
+
+class CourseStats(models.Model):
+    """
+    Read model with the popularity figures of each course.
+    Enrollment counts are incremented as enrollments are created, the 7 and 30
+    day windows and the trending score are recomputed by periodic tasks and the
+    rating is copied from the review stats.
+    """
+
+    course = models.OneToOneField(
+        Course, on_delete=models.CASCADE, primary_key=True, related_name="stats"
+    )
+    enrollment_count = models.PositiveIntegerField(default=0, db_index=True)
+    enrollments_last_7_days = models.PositiveIntegerField(default=0)
+    enrollments_last_30_days = models.PositiveIntegerField(default=0)
+    average_rating = models.DecimalField(max_digits=3, decimal_places=1, default=0.0)
+    total_reviews = models.PositiveIntegerField(default=0)
+    # Recent activity with exponential decay, computed by refresh_trending_scores.
+    trending_score = models.FloatField(default=0, db_index=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Stats for course {self.course_id}"
+
+
+class CourseSimilarity(models.Model):
+    """
+    Precomputed nearest neighbours of each course, by co-enrollment.
+    Rebuilt offline by the build_course_similarities task.
+    """
+
+    course = models.ForeignKey(
+        Course, on_delete=models.CASCADE, related_name="similar_courses"
+    )
+    similar_course = models.ForeignKey(
+        Course, on_delete=models.CASCADE, related_name="similar_to"
+    )
+    # Cosine similarity of the enrollments of both courses, between 0 and 1.
+    score = models.FloatField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["course", "similar_course"], name="unique_course_similarity"
+            )
+        ]
+
+    def __str__(self):
+        return f"Course {self.similar_course_id} similar to {self.course_id}"
+
+
+class CourseInterest(models.Model):
+    """
+    Sparse interest vector of a course: how relevant the course is to each
+    interest area students can pick. Rebuilt by the build_course_interests task.
+    """
+
+    course = models.ForeignKey(
+        Course, on_delete=models.CASCADE, related_name="interests"
+    )
+    interest_area = models.ForeignKey("users.InterestArea", on_delete=models.CASCADE)
+    weight = models.FloatField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["course", "interest_area"], name="unique_course_interest"
+            )
+        ]
+
+    def __str__(self):
+        return f"Course {self.course_id} interest {self.interest_area_id}"
+
+
+@receiver(post_save, sender=Enrollment)
+def record_course_enrollment(sender, instance, created, raw=False, **kwargs):
+    """
+    Increment the enrollment counters of the course in place.
+    """
+    if raw or not created or not instance.course_id:
+        return
+
+    CourseStats.objects.get_or_create(course_id=instance.course_id)
+    CourseStats.objects.filter(course_id=instance.course_id).update(
+        enrollment_count=models.F("enrollment_count") + 1,
+        enrollments_last_7_days=models.F("enrollments_last_7_days") + 1,
+        enrollments_last_30_days=models.F("enrollments_last_30_days") + 1,
+    )
+    transaction.on_commit(popular_courses.invalidate)
+
+
+def invalidate_course_details(course_ids):
+    """
+    Drop the cached detail pages of the courses once the write is committed.
+    """
+    course_ids = [course_id for course_id in course_ids if course_id]
+    if course_ids:
+        transaction.on_commit(lambda: course_details.invalidate(course_ids))
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def invalidate_course_detail(sender, instance, **kwargs):
+    invalidate_course_details([instance.pk])
+
+
+@receiver(post_save, sender=Lesson)
+@receiver(post_delete, sender=Lesson)
+@receiver(post_save, sender=Price)
+@receiver(post_delete, sender=Price)
+@receiver(post_save, sender=CourseRequirement)
+@receiver(post_delete, sender=CourseRequirement)
+@receiver(post_save, sender=Suggestion)
+@receiver(post_delete, sender=Suggestion)
+def invalidate_related_course_detail(sender, instance, **kwargs):
+    """
+    Lessons, price, requirements and suggestions are rendered on the course page.
+    """
+    invalidate_course_details([instance.course_id])
+
+
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+def invalidate_category_course_details(sender, instance, **kwargs):
+    """
+    The category path of the courses of the whole subtree may have changed.
+    """
+    invalidate_course_details(
+        Course.objects.filter(category__in=instance.get_subtree()).values_list(
+            "pk", flat=True
+        )
+    )
+
+
+def invalidate_mentor_courses(mentor_id):
+    invalidate_course_details(
+        Course.objects.filter(mentor_id=mentor_id).values_list("pk", flat=True)
+    )
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_mentor_name_course_details(sender, instance, raw=False, **kwargs):
+    """
+    The mentor name is rendered on the pages of their courses.
+    """
+    if not raw and instance.role == "mentor":
+        invalidate_mentor_courses(instance.pk)
+
+
+@receiver(post_save, sender="users.MentorProfile")
+def invalidate_mentor_profile_course_details(sender, instance, raw=False, **kwargs):
+    """
+    The mentor profile is rendered on the pages of their courses.
+    """
+    if not raw:
+        invalidate_mentor_courses(instance.user_id)
@@ -0,0 +1,55 @@
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+# Stable ordering for paginated course listings, id breaks ties on created_at.
+COURSE_LISTING_ORDER = ("-created_at", "-id")
+
+
+class CourseCursorPagination(CursorPagination):
+    """
+    Keyset pagination for course listings, ordered by (created_at, id).
+    Every page costs the same index range scan and cursors stay stable
+    while new courses are inserted.
+    """
+
+    page_size = 15
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    ordering = COURSE_LISTING_ORDER
+
+
+class CoursePagination(PageNumberPagination):
+    """
+    Page number pagination for course listings.
+    Clients can opt in to keyset pagination with "?pagination=cursor"
+    (for infinite scroll), the returned next/previous links keep the mode.
+    """
+
+    page_size = 15  # Number of courses per page
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    mode_query_param = "pagination"
+
+    cursor_pagination_class = CourseCursorPagination
+    cursor_paginator = None
+
+    def is_cursor_mode(self, request):
+        return (
+            request.query_params.get(self.mode_query_param) == "cursor"
+            or self.cursor_pagination_class.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.is_cursor_mode(request):
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_html_context(self):
+        if self.cursor_paginator:
+            return self.cursor_paginator.get_html_context()
+        return super().get_html_context()
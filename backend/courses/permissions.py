@@ -1,6 +1,7 @@
 from rest_framework.permissions import BasePermission, SAFE_METHODS
 
-from .models import Enrollment, Course, Lesson
+from .entitlements import get_course_entitlement
+from .models import Course, Lesson
 
 
 class MentorOnlyPermission(BasePermission):
@@ -52,15 +53,16 @@ class IsCoursePurchased(BasePermission):
         if request.user.is_authenticated:
             # If the object is a Lesson, retrieve the related Course.
             if isinstance(obj, Lesson):
-                course = obj.course
+                course_id = obj.course_id
             elif isinstance(obj, Course):
-                course = obj
+                course_id = obj.pk
             else:
                 # If the object is neither a Course nor a Lesson, deny access.
                 return False
 
             # Check if the user has purchased the course.
-            return Enrollment.objects.filter(user=request.user, course=course).exists()
+            entitlement = get_course_entitlement(request.user, course_id)
+            return entitlement is not None and entitlement.is_enrolled
 
         # If the user is not authenticated, deny access.
         return False
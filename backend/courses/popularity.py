@@ -0,0 +1,51 @@
+from django.core.cache import cache
+
+# More candidates than a page of results, so that excluding the courses a user
+# has purchased still leaves enough to show.
+RANKING_CANDIDATES = 100
+RANKING_TIMEOUT = 10 * 60
+
+
+class CourseRankingCache:
+    """
+    Ranking of the courses by one of the CourseStats columns, kept in the shared
+    cache as a list of course ids, best first.
+
+    The ranking is rebuilt from the indexed column when missing, and dropped
+    whenever the column is updated. Reading it costs one cache lookup.
+    """
+
+    def __init__(self, key, field):
+        self.key = key
+        self.field = field
+
+    def build(self):
+        from .models import CourseStats
+
+        return list(
+            CourseStats.objects.filter(**{f"{self.field}__gt": 0})
+            .order_by(f"-{self.field}", "course_id")
+            .values_list("course_id", flat=True)[:RANKING_CANDIDATES]
+        )
+
+    def get(self):
+        return cache.get_or_set(self.key, self.build, timeout=RANKING_TIMEOUT)
+
+    def get_top(self, queryset, limit, exclude=()):
+        """
+        The best ranked courses of the queryset, skipping the excluded course ids.
+        The queryset applies the visibility filters (approved, active category, ...),
+        so courses hidden since the ranking was built are never returned.
+        """
+        ranking = [pk for pk in self.get() if pk not in exclude]
+        courses = {course.pk: course for course in queryset.filter(pk__in=ranking)}
+        return [courses[pk] for pk in ranking if pk in courses][:limit]
+
+    def invalidate(self):
+        cache.delete(self.key)
+
+
+# Most enrolled courses of all time
+popular_courses = CourseRankingCache("courses:popular", "enrollment_count")
+# Courses with the most recent activity, see courses.tasks.refresh_trending_scores
+trending_courses = CourseRankingCache("courses:trending", "trending_score")
@@ -0,0 +1,126 @@
+from django.conf import settings
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+    TrigramWordSimilarity,
+)
+from django.db.models import F, OuterRef, Q, Subquery
+from django.utils.module_loading import import_string
+
+from .pagination import COURSE_LISTING_ORDER
+
+# Text search configuration used for both the stored vectors and the queries
+SEARCH_CONFIG = "english"
+
+
+class BaseSearchBackend:
+    """
+    Interface of the course search backends.
+    The backend is chosen with the COURSE_SEARCH_BACKEND setting, so an
+    external engine (e.g. the Elasticsearch CourseDocument sketched in
+    documents.py) can be plugged in without changing the views.
+    """
+
+    def search(self, queryset, query):
+        """
+        Filter the course queryset by the search query, most relevant first.
+        """
+        raise NotImplementedError
+
+    def suggest(self, queryset, query, limit):
+        """
+        Titles of the courses best matching a partial query, for typeahead.
+        Returns a list of dictionaries with id and title.
+        """
+        raise NotImplementedError
+
+    def update_courses(self, course_ids):
+        """
+        Refresh the index entries of the given courses.
+        """
+
+    def remove_courses(self, course_ids):
+        """
+        Remove the given courses from the index.
+        """
+
+
+class IcontainsSearchBackend(BaseSearchBackend):
+    """
+    Substring matching without an index, for databases other than PostgreSQL.
+    """
+
+    def search(self, queryset, query):
+        return queryset.filter(
+            Q(title__icontains=query)
+            | Q(description__icontains=query)
+            | Q(category__name__icontains=query)
+            | Q(category__description__icontains=query)
+        ).order_by(*COURSE_LISTING_ORDER)
+
+    def suggest(self, queryset, query, limit):
+        return list(
+            queryset.filter(title__icontains=query)
+            .order_by("title")
+            .values("id", "title")[:limit]
+        )
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """
+    Full text search on the Course.search_vector column (GIN indexed),
+    ranked with ts_rank. Title matches weigh the most, then the category
+    name, the description and the category description.
+    """
+
+    def get_search_vector(self):
+        from .models import Category
+
+        category = Category.objects.filter(pk=OuterRef("category_id"))
+        return (
+            SearchVector("title", weight="A", config=SEARCH_CONFIG)
+            + SearchVector(
+                Subquery(category.values("name")[:1]), weight="B", config=SEARCH_CONFIG
+            )
+            + SearchVector("description", weight="C", config=SEARCH_CONFIG)
+            + SearchVector(
+                Subquery(category.values("description")[:1]),
+                weight="D",
+                config=SEARCH_CONFIG,
+            )
+        )
+
+    def search(self, queryset, query):
+        search_query = SearchQuery(query, search_type="websearch", config=SEARCH_CONFIG)
+        return (
+            queryset.filter(search_vector=search_query)
+            .annotate(rank=SearchRank(F("search_vector"), search_query))
+            .order_by("-rank", *COURSE_LISTING_ORDER)
+        )
+
+    def suggest(self, queryset, query, limit):
+        # Word similarity tolerates typos and matches prefixes of the title words,
+        # the "%>" operator is served by the trigram GIN index on the title.
+        return list(
+            queryset.filter(title__trigram_word_similar=query)
+            .annotate(similarity=TrigramWordSimilarity(query, "title"))
+            .order_by("-similarity", "title")
+            .values("id", "title")[:limit]
+        )
+
+    def update_courses(self, course_ids):
+        from .models import Course
+
+        # One UPDATE for all the courses, the vector is computed in the database
+        return Course.objects.filter(pk__in=course_ids).update(
+            search_vector=self.get_search_vector()
+        )
+
+    def remove_courses(self, course_ids):
+        # The vector is stored on the course row and goes away with it.
+        pass
+
+
+def get_search_backend():
+    return import_string(settings.COURSE_SEARCH_BACKEND)()
@@ -0,0 +1,318 @@
+from celery import shared_task
+from datetime import timedelta
+import re
+from django.db import transaction
+import logging
+
+logger = logging.getLogger(__name__)
+
+SEARCH_INDEX_BATCH_SIZE = 500
+
+# Activity loses half of its weight in the trending score every 3 days and
+# is ignored after 30 days (less than 0.1% of its initial weight).
+TRENDING_HALF_LIFE_DAYS = 3
+TRENDING_WINDOW_DAYS = 30
+TRENDING_WEIGHTS = {"enrollment": 3.0, "review": 2.0, "comment": 1.0}
+
+# Number of neighbours kept for each course by the recommender.
+SIMILAR_COURSES_PER_COURSE = 20
+
+# Weight of an interest area found in each part of a course.
+INTEREST_WEIGHTS = {
+    "title": 1.0,
+    "category": 0.8,
+    "mentor_specialisations": 0.5,
+    "description": 0.3,
+}
+
+
+@shared_task
+def process_search_index_outbox(batch_size=SEARCH_INDEX_BATCH_SIZE):
+    """
+    Drain the search index outbox in batches.
+    Each batch is one bulk update of the index (and one removal for deleted
+    courses) no matter how many times the courses were changed.
+    """
+
+    from .models import Course, SearchIndexOutbox
+    from .search import get_search_backend
+
+    backend = get_search_backend()
+    processed = 0
+
+    while True:
+        with transaction.atomic():
+            # Skip rows locked by a concurrent run instead of waiting for them
+            entries = list(
+                SearchIndexOutbox.objects.select_for_update(skip_locked=True)
+                .order_by("id")
+                .values_list("id", "course_id")[:batch_size]
+            )
+            if not entries:
+                break
+
+            course_ids = {course_id for _, course_id in entries}
+            existing = set(
+                Course.objects.filter(pk__in=course_ids).values_list("pk", flat=True)
+            )
+            if existing:
+                backend.update_courses(existing)
+            if course_ids - existing:
+                backend.remove_courses(course_ids - existing)
+
+            SearchIndexOutbox.objects.filter(
+                id__in=[entry_id for entry_id, _ in entries]
+            ).delete()
+            processed += len(entries)
+
+    if processed:
+        logger.info(f"Processed {processed} search index outbox entries.")
+    return processed
+
+
+@shared_task
+def refresh_course_stats():
+    """
+    Recompute the course stats from the enrollments and reviews.
+    The all-time counts are kept up to date as enrollments are created, this
+    moves the 7 and 30 day windows forward and repairs any drift.
+    """
+
+    from django.db.models import Count, Q
+    from django.utils import timezone
+    from review.models import CourseReviewStats
+    from .models import Course, CourseStats, Enrollment
+    from .popularity import popular_courses
+
+    now = timezone.now()
+    enrollments = {
+        row["course_id"]: row
+        for row in Enrollment.objects.filter(course__isnull=False)
+        .values("course_id")
+        .annotate(
+            total=Count("id"),
+            last_7_days=Count(
+                "id", filter=Q(purchased_at__gte=now - timedelta(days=7))
+            ),
+            last_30_days=Count(
+                "id", filter=Q(purchased_at__gte=now - timedelta(days=30))
+            ),
+        )
+    }
+    ratings = {
+        stats.course_id: stats
+        for stats in CourseReviewStats.objects.only(
+            "course_id", "average_rating", "total_reviews"
+        )
+    }
+
+    stats = []
+    for course_id in Course.objects.values_list("pk", flat=True):
+        counts = enrollments.get(course_id, {})
+        rating = ratings.get(course_id)
+        stats.append(
+            CourseStats(
+                course_id=course_id,
+                enrollment_count=counts.get("total", 0),
+                enrollments_last_7_days=counts.get("last_7_days", 0),
+                enrollments_last_30_days=counts.get("last_30_days", 0),
+                average_rating=rating.average_rating if rating else 0,
+                total_reviews=rating.total_reviews if rating else 0,
+            )
+        )
+
+    CourseStats.objects.bulk_create(
+        stats,
+        update_conflicts=True,
+        unique_fields=["course"],
+        update_fields=[
+            "enrollment_count",
+            "enrollments_last_7_days",
+            "enrollments_last_30_days",
+            "average_rating",
+            "total_reviews",
+        ],
+        batch_size=1000,
+    )
+    transaction.on_commit(popular_courses.invalidate)
+
+    logger.info(f"Refreshed stats of {len(stats)} courses.")
+    return len(stats)
+
+
+@shared_task
+def refresh_trending_scores():
+    """
+    Score each course by its recent enrollments, reviews and comments, each
+    weighted by its kind and decayed exponentially with its age.
+    The activity is counted per course and day in the database, so the work
+    done here depends on the number of active courses, not on the activity.
+    """
+
+    from collections import defaultdict
+    from django.db.models import Count, F
+    from django.db.models.functions import TruncDate
+    from django.utils import timezone
+    from comments.models import Comment
+    from review.models import Review
+    from .models import CourseStats, Enrollment
+    from .popularity import trending_courses
+
+    today = timezone.localdate()
+    since = today - timedelta(days=TRENDING_WINDOW_DAYS)
+
+    daily_activity = {
+        "enrollment": Enrollment.objects.filter(purchased_at__date__gte=since)
+        .annotate(day=TruncDate("purchased_at"))
+        .values("course_id", "day"),
+        # Review dates are stored without time
+        "review": Review.objects.filter(created_at__gte=since).values(
+            "course_id", day=F("created_at")
+        ),
+        "comment": Comment.objects.filter(created_at__date__gte=since)
+        .annotate(day=TruncDate("created_at"))
+        .values("course_id", "day"),
+    }
+
+    scores = defaultdict(float)
+    for kind, queryset in daily_activity.items():
+        rows = queryset.filter(course__isnull=False).annotate(count=Count("id"))
+        for row in rows:
+            age = (today - row["day"]).days
+            decay = 0.5 ** (age / TRENDING_HALF_LIFE_DAYS)
+            scores[row["course_id"]] += TRENDING_WEIGHTS[kind] * row["count"] * decay
+
+    with transaction.atomic():
+        CourseStats.objects.exclude(course_id__in=scores).exclude(
+            trending_score=0
+        ).update(trending_score=0)
+        CourseStats.objects.bulk_create(
+            [
+                CourseStats(course_id=course_id, trending_score=score)
+                for course_id, score in scores.items()
+            ],
+            update_conflicts=True,
+            unique_fields=["course"],
+            update_fields=["trending_score"],
+            batch_size=1000,
+        )
+        transaction.on_commit(trending_courses.invalidate)
+
+    logger.info(f"Refreshed trending scores of {len(scores)} courses.")
+    return len(scores)
+
+
+@shared_task
+def build_course_similarities(neighbours=SIMILAR_COURSES_PER_COURSE):
+    """
+    Item-item collaborative filtering over the enrollments.
+
+    The user x course enrollment matrix is kept sparse, as the set of courses of
+    each user, and only the pairs of courses sharing a student are counted.
+    The similarity of two courses is the cosine of their enrollment columns:
+    co_enrollments / sqrt(enrollments_a * enrollments_b).
+    """
+
+    import heapq
+    import math
+    from collections import Counter, defaultdict
+    from .models import CourseSimilarity, Enrollment
+
+    courses_by_user = defaultdict(list)
+    for user_id, course_id in Enrollment.objects.filter(
+        user__isnull=False, course__isnull=False
+    ).values_list("user_id", "course_id"):
+        courses_by_user[user_id].append(course_id)
+
+    enrollments = Counter()
+    co_enrollments = defaultdict(Counter)
+    for courses in courses_by_user.values():
+        enrollments.update(courses)
+        for course_id in courses:
+            for other_id in courses:
+                if other_id != course_id:
+                    co_enrollments[course_id][other_id] += 1
+
+    similarities = []
+    for course_id, counts in co_enrollments.items():
+        scores = (
+            (
+                count / math.sqrt(enrollments[course_id] * enrollments[other_id]),
+                other_id,
+            )
+            for other_id, count in counts.items()
+        )
+        for score, other_id in heapq.nlargest(neighbours, scores):
+            similarities.append(
+                CourseSimilarity(
+                    course_id=course_id, similar_course_id=other_id, score=score
+                )
+            )
+
+    with transaction.atomic():
+        CourseSimilarity.objects.all().delete()
+        CourseSimilarity.objects.bulk_create(similarities, batch_size=1000)
+
+    logger.info(f"Stored {len(similarities)} course similarities.")
+    return len(similarities)
+
+
+def tokenize(text):
+    return set(re.findall(r"\w+", text.lower()))
+
+
+@shared_task
+def build_course_interests():
+    """
+    Precompute the interest vector of every visible course.
+    An interest area is found in a part of the course (title, category path,
+    mentor specialisations, description) when all the words of its name appear
+    there, and adds the weight of that part to the course vector.
+    """
+
+    from users.models import InterestArea, MentorProfile
+    from .mixins import bump_resource_version
+    from .models import Course, CourseInterest
+
+    areas = [
+        (area_id, tokenize(name))
+        for area_id, name in InterestArea.objects.values_list("id", "name")
+    ]
+    specialisations = {}
+    for mentor_id, name in MentorProfile.objects.filter(
+        specialisations__isnull=False
+    ).values_list("user_id", "specialisations__name"):
+        specialisations[mentor_id] = specialisations.get(mentor_id, "") + f" {name}"
+
+    interests = []
+    courses = Course.objects.approved().values_list(
+        "id", "title", "category__full_path", "mentor_id", "description"
+    )
+    for course_id, title, category, mentor_id, description in courses:
+        parts = {
+            "title": tokenize(title),
+            "category": tokenize(category or ""),
+            "mentor_specialisations": tokenize(specialisations.get(mentor_id, "")),
+            "description": tokenize(description),
+        }
+        for area_id, words in areas:
+            weight = sum(
+                INTEREST_WEIGHTS[part]
+                for part, tokens in parts.items()
+                if words and words <= tokens
+            )
+            if weight:
+                interests.append(
+                    CourseInterest(
+                        course_id=course_id, interest_area_id=area_id, weight=weight
+                    )
+                )
+
+    with transaction.atomic():
+        CourseInterest.objects.all().delete()
+        CourseInterest.objects.bulk_create(interests, batch_size=1000)
+        # Revalidate the catalogs ranked by interest
+        transaction.on_commit(lambda: bump_resource_version("course_interests"))
+
+    logger.info(f"Stored {len(interests)} course interests.")
+    return len(interests)
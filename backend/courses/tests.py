@@ -1,3 +1,910 @@
-from django.test import TestCase
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO
+from unittest import skipUnless
+from unittest.mock import patch
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from backend.renderers import ORJSONParser, ORJSONRenderer
+
+from comments.models import Comment
+from review.models import Review
+from users.models import (
+    AcademicSpecialisation,
+    InterestArea,
+    MentorProfile,
+    StudentProfile,
+)
+
+from .category_cache import CategoryTreeCache
+from .detail_cache import COURSE_DETAIL_TIMEOUT, course_details
+from .enrollment_cache import enrolled_courses
+from .models import (
+    Category,
+    Course,
+    CourseInterest,
+    CourseSimilarity,
+    CourseStats,
+    Enrollment,
+    Lesson,
+    Price,
+    SearchIndexOutbox,
+)
+from .popularity import popular_courses
+from .search import get_search_backend
+from .tasks import (
+    build_course_interests,
+    build_course_similarities,
+    process_search_index_outbox,
+    refresh_course_stats,
+    refresh_trending_scores,
+)
 
 # Create your tests here.
+
+
+class CategoryTreeTests(TestCase):
+    def setUp(self):
+        self.root = Category.objects.create(name="Development")
+        self.child = Category.objects.create(name="Web", parent=self.root)
+        self.leaf = Category.objects.create(name="Frontend", parent=self.child)
+
+    def test_ancestry_is_materialized(self):
+        """Test that every category stores the ids of its ancestors"""
+        self.leaf.refresh_from_db()
+        self.assertEqual(self.root.ancestry, "")
+        self.assertEqual(self.leaf.ancestry, f"{self.root.id}/{self.child.id}/")
+
+    def test_deactivating_parent_cascades_to_subtree(self):
+        """Test that deactivating a category marks its whole subtree inactive"""
+        self.root.is_active = False
+        self.root.save()
+
+        self.leaf.refresh_from_db()
+        self.assertFalse(self.leaf.is_active_chain)
+        self.assertTrue(self.leaf.is_active)
+
+        self.root.is_active = True
+        self.root.save()
+
+        self.leaf.refresh_from_db()
+        self.assertTrue(self.leaf.is_active_chain)
+
+    def test_reparenting_moves_subtree(self):
+        """Test that moving a category rewrites the path of its descendants"""
+        other = Category.objects.create(name="Design")
+        self.child.parent = other
+        self.child.save()
+
+        self.leaf.refresh_from_db()
+        self.assertEqual(self.leaf.ancestry, f"{other.id}/{self.child.id}/")
+
+    def test_renaming_refreshes_subtree_paths(self):
+        """Test that renaming a category rewrites the full path of its subtree"""
+        self.root.name = "Programming"
+        self.root.save()
+
+        self.leaf.refresh_from_db()
+        self.assertEqual(self.leaf.full_path, "Programming > Web > Frontend")
+        self.assertEqual(self.leaf.depth, 2)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.leaf.get_full_path(), "Programming > Web > Frontend")
+
+    def test_subtree_is_one_query(self):
+        """Test that all descendants of a category are fetched in one query"""
+        Category.objects.create(name="Design")
+        with self.assertNumQueries(1):
+            subtree = set(self.root.get_subtree())
+        self.assertEqual(subtree, {self.root, self.child, self.leaf})
+        self.assertEqual(set(self.child.get_subtree()), {self.child, self.leaf})
+
+    def test_course_filter_uses_active_chain(self):
+        """Test that courses under an inactive ancestor are filtered in SQL"""
+        mentor = get_user_model().objects.create_user(
+            email="mentor@test.com", password="testpass123", role="mentor"
+        )
+        course = Course.objects.create(
+            title="React basics",
+            description="Course",
+            category=self.leaf,
+            mentor=mentor,
+            status="approved",
+        )
+        self.assertIn(course, Course.objects.approved().in_active_category())
+
+        self.child.is_active = False
+        self.child.save()
+
+        with self.assertNumQueries(1):
+            courses = list(Course.objects.approved().in_active_category())
+        self.assertNotIn(course, courses)
+
+
+class CategoryTreeCacheTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        with self.captureOnCommitCallbacks(execute=True):
+            root = Category.objects.create(name="Development")
+            Category.objects.create(name="Web", parent=root)
+
+    def test_category_listing_costs_no_queries(self):
+        """Test that category listings are served from the cached tree"""
+        self.client.get("/parent-categories/")  # Builds the tree
+
+        with self.assertNumQueries(0):
+            response = self.client.get("/parent-categories/")
+        self.assertEqual(response.data[0]["name"], "Development")
+        self.assertEqual(response.data[0]["sub_categories"][0]["name"], "Web")
+
+        with self.assertNumQueries(0):
+            response = self.client.get("/subcategories/")
+        self.assertEqual([category["name"] for category in response.data], ["Web"])
+
+    def test_tree_endpoint_supports_conditional_requests(self):
+        """Test that the category tree can be revalidated with its ETag"""
+        response = self.client.get("/categories/tree/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0]["children"][0]["name"], "Web")
+        self.assertIn("Last-Modified", response)
+
+        response = self.client.get(
+            "/categories/tree/", HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_write_invalidates_other_workers(self):
+        """Test that a category write makes other processes rebuild their tree"""
+        other_worker = CategoryTreeCache()
+        self.assertIsNone(other_worker.get().get_by_name("Design"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.create(name="Design")
+
+        with self.assertNumQueries(1):
+            self.assertIsNotNone(other_worker.get().get_by_name("Design"))
+
+
+class CourseListingPaginationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        mentor = get_user_model().objects.create_user(
+            email="mentor@test.com", password="testpass123", role="mentor"
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category = Category.objects.create(name="Development")
+        for index in range(3):
+            Course.objects.create(
+                title=f"Python course {index}",
+                description="Course",
+                category=self.category,
+                mentor=mentor,
+                status="approved",
+            )
+        process_search_index_outbox()
+
+    def test_search_is_paginated(self):
+        """Test that search results are paginated in the database"""
+        response = self.client.get("/course/search/", {"q": "python", "page_size": 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 3)
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertIsNotNone(response.data["next"])
+
+    def test_category_filter_is_paginated(self):
+        """Test that category filter results are paginated in the database"""
+        response = self.client.get(
+            "/course/category/filter/", {"category": "Development", "page_size": 2}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 3)
+        self.assertEqual(len(response.data["results"]), 2)
+
+    def test_cursor_mode_is_opt_in(self):
+        """Test that the catalog switches to keyset pagination on request"""
+        response = self.client.get(
+            "/courses/", {"pagination": "cursor", "page_size": 2}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("count", response.data)
+        self.assertEqual(
+            [course["title"] for course in response.data["results"]],
+            ["Python course 2", "Python course 1"],
+        )
+
+        # A course added after the first page must not shift the next page
+        Course.objects.create(
+            title="New course",
+            description="Course",
+            category=self.category,
+            status="approved",
+        )
+        response = self.client.get(response.data["next"])
+        self.assertEqual(
+            [course["title"] for course in response.data["results"]],
+            ["Python course 0"],
+        )
+        self.assertIsNone(response.data["next"])
+
+
+class CourseListingQueryCountTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        User = get_user_model()
+        root = Category.objects.create(name="Development")
+        child = Category.objects.create(name="Web", parent=root)
+        leaves = [
+            Category.objects.create(name="Frontend", parent=child),
+            Category.objects.create(name="Backend", parent=child),
+        ]
+        for index in range(10):
+            mentor = User.objects.create_user(
+                email=f"mentor{index}@test.com", password="testpass123", role="mentor"
+            )
+            course = Course.objects.create(
+                title=f"Course {index}",
+                description="Course",
+                category=leaves[index % 2],
+                mentor=mentor,
+                status="approved",
+            )
+            Price.objects.create(course=course, amount=Decimal("10.00"))
+
+    def test_catalog_page_query_count(self):
+        """Test that a catalog page costs a constant number of queries"""
+        # Version aggregate (ETag), count, courses joined with mentor/category/price
+        with self.assertNumQueries(3):
+            response = self.client.get("/courses/")
+        self.assertEqual(len(response.data["results"]), 10)
+        self.assertEqual(
+            response.data["results"][0]["category_path"],
+            "Development > Web > Backend",
+        )
+
+
+class PopularCoursesTests(TestCase):
+    def setUp(self):
+        cache.clear()  # Enrolled course ids cached by previous tests
+        self.client = APIClient()
+        User = get_user_model()
+        category = Category.objects.create(name="Programming")
+        self.courses = [
+            Course.objects.create(
+                title=f"Course {index}",
+                description="Course",
+                category=category,
+                status="approved",
+            )
+            for index in range(3)
+        ]
+        self.students = [
+            User.objects.create_user(
+                email=f"student{index}@test.com", password="testpass123"
+            )
+            for index in range(3)
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            # Course 1 has 3 enrollments, course 0 has 1 and course 2 has none
+            for student in self.students:
+                Enrollment.objects.create(user=student, course=self.courses[1])
+            Enrollment.objects.create(user=self.students[0], course=self.courses[0])
+        popular_courses.invalidate()
+
+    def test_enrollments_increment_stats(self):
+        """Test that creating enrollments updates the course stats"""
+        stats = CourseStats.objects.get(course=self.courses[1])
+        self.assertEqual(stats.enrollment_count, 3)
+        self.assertEqual(stats.enrollments_last_7_days, 3)
+
+    def test_popular_courses_served_from_leaderboard(self):
+        """Test that popular courses are ranked without aggregating enrollments"""
+        self.client.get("/popular-courses/")  # Builds the leaderboard
+
+        # Only the visible courses of the cached ranking are fetched
+        with self.assertNumQueries(1):
+            response = self.client.get("/popular-courses/")
+        self.assertEqual(
+            [course["id"] for course in response.data],
+            [self.courses[1].id, self.courses[0].id],
+        )
+
+    def test_purchased_courses_are_excluded(self):
+        """Test that a student does not see the popular courses they bought"""
+        self.client.force_authenticate(self.students[0])
+        response = self.client.get("/popular-courses/")
+        self.assertEqual(response.data, [])
+
+        self.client.force_authenticate(self.students[1])
+        response = self.client.get("/popular-courses/")
+        self.assertEqual(
+            [course["id"] for course in response.data], [self.courses[0].id]
+        )
+
+    def test_refresh_recomputes_stats(self):
+        """Test that the periodic refresh rebuilds the stats from enrollments"""
+        CourseStats.objects.all().delete()
+        refresh_course_stats()
+        self.assertEqual(
+            list(
+                CourseStats.objects.order_by("course_id").values_list(
+                    "enrollment_count", flat=True
+                )
+            ),
+            [1, 3, 0],
+        )
+
+
+class TrendingCoursesTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        User = get_user_model()
+        category = Category.objects.create(name="Programming")
+        self.old_favourite, self.rising = [
+            Course.objects.create(
+                title=title, description="Course", category=category, status="approved"
+            )
+            for title in ["Old favourite", "Rising"]
+        ]
+        students = [
+            User.objects.create_user(
+                email=f"student{index}@test.com", password="testpass123"
+            )
+            for index in range(3)
+        ]
+        for student in students:
+            Enrollment.objects.create(user=student, course=self.old_favourite)
+        Enrollment.objects.filter(course=self.old_favourite).update(
+            purchased_at=timezone.now() - timedelta(days=20)
+        )
+        Review.objects.create(
+            user=students[0], course=self.rising, rating=5, review_text="Great"
+        )
+        Comment.objects.create(user=students[1], course=self.rising, comment="Nice")
+
+    def test_recent_activity_outranks_old_activity(self):
+        """Test that recent activity weighs more than older enrollments"""
+        refresh_trending_scores()
+
+        old_score = CourseStats.objects.get(course=self.old_favourite).trending_score
+        rising_score = CourseStats.objects.get(course=self.rising).trending_score
+        self.assertAlmostEqual(rising_score, 3.0)
+        self.assertLess(old_score, 0.1)
+
+        self.client.get("/trending-courses/")  # Builds the ranking
+        with self.assertNumQueries(1):
+            response = self.client.get("/trending-courses/")
+        self.assertEqual(
+            [course["id"] for course in response.data],
+            [self.rising.id, self.old_favourite.id],
+        )
+
+    def test_inactive_courses_drop_out(self):
+        """Test that courses without recent activity lose their score"""
+        refresh_trending_scores()
+        Enrollment.objects.filter(course=self.old_favourite).update(
+            purchased_at=timezone.now() - timedelta(days=60)
+        )
+        refresh_trending_scores()
+
+        stats = CourseStats.objects.get(course=self.old_favourite)
+        self.assertEqual(stats.trending_score, 0)
+
+
+class CourseRecommendationTests(TestCase):
+    def setUp(self):
+        cache.clear()  # Enrolled course ids cached by previous tests
+        self.client = APIClient()
+        User = get_user_model()
+        category = Category.objects.create(name="Programming")
+        self.courses = [
+            Course.objects.create(
+                title=f"Course {index}",
+                description="Course",
+                category=category,
+                status="approved",
+            )
+            for index in range(4)
+        ]
+        enrollments = {
+            "a@test.com": [0, 1],
+            "b@test.com": [0, 1],
+            "c@test.com": [0, 2],
+            "d@test.com": [3],
+            "student@test.com": [0],
+        }
+        for email, courses in enrollments.items():
+            user = User.objects.create_user(email=email, password="testpass123")
+            for index in courses:
+                Enrollment.objects.create(user=user, course=self.courses[index])
+        self.student = user
+
+    def test_similarities_are_cosine_of_enrollments(self):
+        """Test that courses sharing students get a cosine similarity"""
+        build_course_similarities()
+
+        similar = dict(
+            CourseSimilarity.objects.filter(course=self.courses[0]).values_list(
+                "similar_course_id", "score"
+            )
+        )
+        self.assertEqual(set(similar), {self.courses[1].id, self.courses[2].id})
+        self.assertAlmostEqual(similar[self.courses[1].id], 2 / (4 * 2) ** 0.5)
+        self.assertAlmostEqual(similar[self.courses[2].id], 1 / (4 * 1) ** 0.5)
+
+    def test_recommendations_are_one_query(self):
+        """Test that recommendations are read from the precomputed neighbours"""
+        build_course_similarities()
+        self.client.force_authenticate(self.student)
+
+        with self.assertNumQueries(1):
+            response = self.client.get("/courses/recommended/")
+        self.assertEqual(
+            [course["id"] for course in response.data],
+            [self.courses[1].id, self.courses[2].id],
+        )
+
+
+class CourseInterestRankingTests(TestCase):
+    def setUp(self):
+        cache.clear()  # Enrolled course ids cached by previous tests
+        self.client = APIClient()
+        User = get_user_model()
+        self.area = InterestArea.objects.create(name="Machine Learning")
+        mentor = User.objects.create_user(
+            email="mentor@test.com", password="testpass123", role="mentor"
+        )
+        profile, _ = MentorProfile.objects.get_or_create(user=mentor)
+        profile.specialisations.add(
+            AcademicSpecialisation.objects.create(name="Machine learning")
+        )
+        category = Category.objects.create(name="Data Science")
+        self.matching = Course.objects.create(
+            title="Intro to machine learning",
+            description="Course",
+            category=category,
+            mentor=mentor,
+            status="approved",
+        )
+        self.other = Course.objects.create(
+            title="Statistics",
+            description="Course",
+            category=category,
+            status="approved",
+        )
+        self.student = User.objects.create_user(
+            email="student@test.com", password="testpass123", role="student"
+        )
+        profile, _ = StudentProfile.objects.get_or_create(user=self.student)
+        profile.interested_areas.add(self.area)
+
+    def test_course_vectors_weigh_matching_parts(self):
+        """Test that each part of a course matching an interest adds its weight"""
+        build_course_interests()
+        interest = CourseInterest.objects.get(course=self.matching)
+        self.assertEqual(interest.interest_area, self.area)
+        self.assertAlmostEqual(interest.weight, 1.5)
+        self.assertFalse(CourseInterest.objects.filter(course=self.other).exists())
+
+    def test_catalog_is_ordered_by_interest(self):
+        """Test that courses matching the student interests are listed first"""
+        build_course_interests()
+        self.client.force_authenticate(self.student)
+
+        # Enrolled courses, interest areas, version aggregate, count, courses
+        # ranked by interest
+        with self.assertNumQueries(5):
+            response = self.client.get("/courses-authenticated/")
+        self.assertEqual(
+            [course["id"] for course in response.data["results"]],
+            [self.matching.id, self.other.id],
+        )
+
+    def test_interest_changes_update_etag(self):
+        """Test that new interests or course vectors change the catalog ETag"""
+        self.client.force_authenticate(self.student)
+        etag = self.client.get("/courses-authenticated/")["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            build_course_interests()
+        response = self.client.get("/courses-authenticated/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["results"][0]["id"], self.matching.id)
+
+        etag = response["ETag"]
+        self.student.studentprofile.interested_areas.clear()
+        response = self.client.get("/courses-authenticated/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+
+class EnrolledCoursesCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()  # Enrolled course ids cached by previous tests
+        User = get_user_model()
+        category = Category.objects.create(name="Programming")
+        self.courses = [
+            Course.objects.create(
+                title=f"Course {index}",
+                description="Course",
+                category=category,
+                status="approved",
+            )
+            for index in range(2)
+        ]
+        self.student = User.objects.create_user(
+            email="student@test.com", password="testpass123", role="student"
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            Enrollment.objects.create(user=self.student, course=self.courses[0])
+
+    def test_enrolled_courses_are_loaded_once(self):
+        """Test that the enrolled course ids are cached between requests"""
+        self.assertEqual(enrolled_courses.get(self.student), {self.courses[0].id})
+
+        # A new request gets a fresh user object but reuses the cached set
+        student = get_user_model().objects.get(pk=self.student.pk)
+        with self.assertNumQueries(0):
+            self.assertTrue(enrolled_courses.is_enrolled(student, self.courses[0].id))
+            self.assertFalse(enrolled_courses.is_enrolled(student, self.courses[1].id))
+
+    def test_enrollment_invalidates_cache(self):
+        """Test that a new enrollment is visible to the next request"""
+        enrolled_courses.get(self.student)
+        with self.captureOnCommitCallbacks(execute=True):
+            Enrollment.objects.create(user=self.student, course=self.courses[1])
+
+        student = get_user_model().objects.get(pk=self.student.pk)
+        self.assertEqual(
+            enrolled_courses.get(student), {course.id for course in self.courses}
+        )
+
+    def test_catalog_excludes_enrolled_courses(self):
+        """Test that the student catalog excludes purchased courses"""
+        client = APIClient()
+        client.force_authenticate(self.student)
+        response = client.get("/courses-authenticated/")
+        self.assertEqual(
+            [course["id"] for course in response.data["results"]],
+            [self.courses[1].id],
+        )
+
+
+class LessonEntitlementTests(TestCase):
+    def setUp(self):
+        cache.clear()  # Enrolled course ids cached by previous tests
+        self.client = APIClient()
+        User = get_user_model()
+        self.mentor = User.objects.create_user(
+            email="mentor@test.com", password="testpass123", role="mentor"
+        )
+        self.course = Course.objects.create(
+            title="Course", description="Course", mentor=self.mentor, status="approved"
+        )
+        self.lesson = Lesson.objects.create(
+            course=self.course, title="Lesson", content="Content"
+        )
+        self.student = User.objects.create_user(
+            email="student@test.com", password="testpass123", role="student"
+        )
+
+    def get_lesson(self):
+        return self.client.get(
+            f"/lesson/{self.lesson.id}/", {"course_id": self.course.id}
+        )
+
+    def test_purchased_lesson_checks_access_once(self):
+        """Test that the lesson view and its permission share one entitlement"""
+        Enrollment.objects.create(user=self.student, course=self.course)
+        self.client.force_authenticate(self.student)
+        enrolled_courses.get(self.student)  # Warm the enrolled course ids
+
+        # Course, lesson
+        with self.assertNumQueries(2):
+            response = self.get_lesson()
+        self.assertEqual(response.status_code, 200)
+
+    def test_lesson_requires_purchase(self):
+        """Test that students who did not buy the course are denied"""
+        self.client.force_authenticate(self.student)
+        self.assertEqual(self.get_lesson().status_code, 403)
+
+    def test_other_mentor_is_denied(self):
+        """Test that mentors only access the lessons of their courses"""
+        other = get_user_model().objects.create_user(
+            email="other@test.com", password="testpass123", role="mentor"
+        )
+        self.client.force_authenticate(other)
+        self.assertEqual(self.get_lesson().status_code, 403)
+
+        self.client.force_authenticate(self.mentor)
+        self.assertEqual(self.get_lesson().status_code, 200)
+
+
+class CourseDetailCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.mentor = get_user_model().objects.create_user(
+            email="mentor@test.com",
+            password="testpass123",
+            role="mentor",
+            first_name="Jane",
+            last_name="Doe",
+        )
+        MentorProfile.objects.get_or_create(user=self.mentor)
+        self.category = Category.objects.create(name="Programming")
+        self.course = Course.objects.create(
+            title="Django",
+            description="Course",
+            category=self.category,
+            mentor=self.mentor,
+            status="approved",
+        )
+        Price.objects.create(course=self.course, amount=Decimal("10.00"))
+        Lesson.objects.create(course=self.course, title="Intro", content="Content")
+        self.url = f"/course/{self.course.id}/"
+
+    def test_detail_is_served_from_cache(self):
+        """Test that the course page is rendered once and revalidated with its ETag"""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["lessons"][0]["title"], "Intro")
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(self.url)
+            not_modified = self.client.get(
+                self.url, HTTP_IF_NONE_MATCH=response["ETag"]
+            )
+        self.assertEqual(cached.content, response.content)
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_one_entry_for_all_hosts(self):
+        """Test that the Host header does not add cached renderings"""
+        response = self.client.get(self.url)
+        with self.assertNumQueries(0):
+            other = self.client.get(self.url, HTTP_HOST="forged.example.com")
+        self.assertEqual(other.content, response.content)
+        self.assertEqual(
+            cache.get(course_details.get_key(self.course.id))[1], response["ETag"]
+        )
+
+    def test_related_writes_invalidate_detail(self):
+        """Test that writes to rendered relations refresh the course page"""
+        etag = self.client.get(self.url)["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Lesson.objects.create(
+                course=self.course, title="Next", content="Content", order=1
+            )
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["lessons"]), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.name = "Web"
+            self.category.save()
+        self.assertEqual(self.client.get(self.url).json()["category_path"], "Web")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.mentor.first_name = "John"
+            self.mentor.save()
+        self.assertEqual(self.client.get(self.url).json()["mentor_name"], "John Doe")
+
+    def test_unapproved_course_is_not_found(self):
+        """Test that courses pending approval have no public page"""
+        self.course.status = "pending"
+        self.course.save()
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_entries_expire_before_media_urls(self):
+        """Test that cached pages never outlive the presigned media URLs"""
+        self.assertLess(COURSE_DETAIL_TIMEOUT, settings.AWS_QUERYSTRING_EXPIRE)
+
+
+class ConditionalListTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category = Category.objects.create(name="Programming")
+        self.course = Course.objects.create(
+            title="Django",
+            description="Course",
+            category=self.category,
+            status="approved",
+        )
+
+    def test_unchanged_course_list_is_not_modified(self):
+        """Test that an unchanged course list is revalidated with one query"""
+        response = self.client.get("/courses/")
+        self.assertIn("Last-Modified", response)
+
+        # Aggregate of the updated_at columns only
+        with self.assertNumQueries(1):
+            response = self.client.get("/courses/", HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+    def test_course_changes_update_etag(self):
+        """Test that changes to listed courses or their price change the ETag"""
+        etag = self.client.get("/courses/")["ETag"]
+        Price.objects.create(course=self.course, amount=Decimal("5.00"))
+
+        response = self.client.get("/courses/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["results"][0]["price"]["amount"], "5.00")
+
+        # Another page of the same list has its own ETag
+        other = self.client.get("/courses/", {"page_size": 1})
+        self.assertNotEqual(other["ETag"], response["ETag"])
+
+    def test_category_list_revalidates_with_tree_version(self):
+        """Test that category listings are revalidated without queries"""
+        etag = self.client.get("/parent-categories/")["ETag"]
+        with self.assertNumQueries(0):
+            response = self.client.get("/parent-categories/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.create(name="Design")
+        response = self.client.get("/parent-categories/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+
+class ORJSONRendererTests(TestCase):
+    def test_renders_like_drf(self):
+        """Test that the orjson renderer produces the same document as DRF"""
+        data = {
+            "amount": Decimal("499.00"),
+            "created_at": timezone.now(),
+            "status": gettext_lazy("Approved"),
+            "lessons": [{"id": 1, "title": "Intro"}],
+            1: None,
+        }
+        self.assertEqual(
+            ORJSONParser().parse(BytesIO(ORJSONRenderer().render(data))),
+            ORJSONParser().parse(BytesIO(JSONRenderer().render(data))),
+        )
+
+    def test_rejects_invalid_json(self):
+        """Test that malformed request bodies are a parse error"""
+        with self.assertRaises(ParseError):
+            ORJSONParser().parse(BytesIO(b"{"))
+
+
+class SearchIndexOutboxTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name="Programming")
+        self.courses = [
+            Course.objects.create(
+                title=f"Course {index}", description="Course", category=self.category
+            )
+            for index in range(3)
+        ]
+        SearchIndexOutbox.objects.all().delete()
+
+    def patch_backend(self, method):
+        """
+        Patch a method of the configured search backend.
+        """
+        return patch.object(type(get_search_backend()), method)
+
+    def test_course_changes_are_queued(self):
+        """Test that course writes are recorded in the outbox, not indexed inline"""
+        expected = [self.courses[0].id, self.courses[1].id]
+        with self.patch_backend("update_courses") as update:
+            self.courses[0].title = "Renamed"
+            self.courses[0].save()
+            self.courses[1].delete()
+        update.assert_not_called()
+        self.assertEqual(
+            sorted(SearchIndexOutbox.objects.values_list("course_id", flat=True)),
+            expected,
+        )
+
+    def test_category_rename_is_reindexed_in_bulk(self):
+        """Test that a category rename reindexes its courses in one batch"""
+        self.category.name = "Python"
+        self.category.save()
+        self.courses[0].save()
+
+        with self.patch_backend("update_courses") as update, self.patch_backend(
+            "remove_courses"
+        ) as remove:
+            processed = process_search_index_outbox(batch_size=100)
+
+        self.assertEqual(processed, 4)
+        update.assert_called_once_with({course.id for course in self.courses})
+        remove.assert_not_called()
+        self.assertFalse(SearchIndexOutbox.objects.exists())
+
+    def test_deleted_courses_are_removed(self):
+        """Test that deleted courses are removed from the index"""
+        deleted_id = self.courses[2].id
+        self.courses[2].delete()
+
+        with self.patch_backend("remove_courses") as remove:
+            process_search_index_outbox()
+        remove.assert_called_once_with({deleted_id})
+
+
+@skipUnless(connection.vendor == "postgresql", "Full text search needs PostgreSQL")
+@override_settings(COURSE_SEARCH_BACKEND="courses.search.PostgresSearchBackend")
+class PostgresCourseSearchTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.category = Category.objects.create(name="Programming")
+        self.title_match = Course.objects.create(
+            title="Django for beginners",
+            description="Learn to build web applications.",
+            category=self.category,
+            status="approved",
+        )
+        self.description_match = Course.objects.create(
+            title="Web development",
+            description="Build web applications with Django and React.",
+            category=self.category,
+            status="approved",
+        )
+        process_search_index_outbox()
+
+    def test_results_are_ranked(self):
+        """Test that title matches rank above description matches"""
+        response = self.client.get("/course/search/", {"q": "django"})
+        self.assertEqual(
+            [course["id"] for course in response.data["results"]],
+            [self.title_match.id, self.description_match.id],
+        )
+
+    def test_category_rename_is_indexed(self):
+        """Test that renaming a category reindexes its courses"""
+        self.category.name = "Python"
+        self.category.save()
+        process_search_index_outbox()
+
+        response = self.client.get("/course/search/", {"q": "python"})
+        self.assertEqual(response.data["count"], 2)
+
+    def test_suggestions_tolerate_typos(self):
+        """Test that title suggestions match misspelled prefixes"""
+        response = self.client.get("/course/suggest/", {"q": "djngo"})
+        self.assertEqual(
+            [course["id"] for course in response.data], [self.title_match.id]
+        )
+
+
+class CourseSuggestionTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        category = Category.objects.create(name="Programming")
+        for title, status in [
+            ("Python basics", "approved"),
+            ("Advanced Python", "approved"),
+            ("Python drafts", "pending"),
+        ]:
+            Course.objects.create(
+                title=title, description="Course", category=category, status=status
+            )
+
+    def test_suggestions_return_titles_only(self):
+        """Test that suggestions list matching approved course titles"""
+        response = self.client.get("/course/suggest/", {"q": "pyth", "limit": 5})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [course["title"] for course in response.data],
+            ["Advanced Python", "Python basics"],
+        )
+        self.assertEqual(set(response.data[0]), {"id", "title"})
+        self.assertIn("max-age=60", response["Cache-Control"])
+
+    def test_short_query_returns_nothing(self):
+        """Test that a single character does not hit the database"""
+        with self.assertNumQueries(0):
+            response = self.client.get("/course/suggest/", {"q": "p"})
+        self.assertEqual(response.data, [])
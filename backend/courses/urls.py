@@ -17,7 +17,11 @@ from .views import (
     CourseCategoryFilterView,
     AddNewLessonsView,
     PopularCoursesListView,
+    TrendingCoursesListView,
+    RecommendedCoursesListView,
     AdminMentorCourseDetailView,
+    CategoryTreeView,
+    CourseSuggestView,
 )
 
 router = DefaultRouter()
@@ -29,6 +33,7 @@ router.register(r"course/suggestions", CourseSuggestionView, basename="suggestio
 
 urlpatterns = [
     path("", include(router.urls)),
+    path("categories/tree/", CategoryTreeView.as_view(), name="category-tree"),
     path("course/<int:pk>/", CourseDetailView.as_view(), name="mentor-course-detail"),
     path(
         "course-update/<int:pk>/",
@@ -43,6 +48,11 @@ urlpatterns = [
         name="suggestion",
     ),
     path("courses/", CourseListView.as_view(), name="course"),
+    path(
+        "courses/recommended/",
+        RecommendedCoursesListView.as_view(),
+        name="courses-recommended",
+    ),
     path(
         "courses-authenticated/",
         AuthenticatedCourseListView.as_view(),
@@ -55,6 +65,7 @@ urlpatterns = [
     ),
     path("enrolledcourses/", EnrolledCoursesListView.as_view(), name="enrolledcourses"),
     path("course/search/", CourseSearchView.as_view(), name="course-search"),
+    path("course/suggest/", CourseSuggestView.as_view(), name="course-suggest"),
     path(
         "course/category/filter/",
         CourseCategoryFilterView.as_view(),
@@ -62,6 +73,9 @@ urlpatterns = [
     ),
     path("create-lessons/", AddNewLessonsView.as_view(), name="create-lesson"),
     path("popular-courses/", PopularCoursesListView.as_view(), name="popular-course"),
+    path(
+        "trending-courses/", TrendingCoursesListView.as_view(), name="trending-courses"
+    ),
     path(
         "admin-mentor-course/<int:pk>/",
         AdminMentorCourseDetailView.as_view(),
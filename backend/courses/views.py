@@ -1,5 +1,9 @@
 import json
+from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils.decorators import method_decorator
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.generics import (
     RetrieveAPIView,
@@ -13,10 +17,21 @@ from rest_framework.views import APIView
 from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 import logging
 from rest_framework.exceptions import PermissionDenied, NotFound
-from django.db.models import Q
-from django.db.models import Count
-from rest_framework.pagination import PageNumberPagination
-
+from django.db.models import Sum
+
+from users.models import InterestArea
+from .category_cache import category_tree
+from .detail_cache import course_details
+from .enrollment_cache import enrolled_courses
+from .entitlements import get_course_entitlement
+from .popularity import popular_courses, trending_courses
+from .mixins import (
+    ConditionalListMixin,
+    UpdatedAtVersionMixin,
+    get_resource_version,
+)
+from .pagination import CoursePagination, COURSE_LISTING_ORDER
+from .search import get_search_backend
 from .permissions import (
     MentorOnlyPermission,
     MentorOrAdminPermission,
@@ -41,12 +56,36 @@ from .serializers import (
 logger = logging.getLogger(__name__)
 
 
-class CoursePagination(PageNumberPagination):
-    page_size = 15  # Number of courses per page
-    page_size_query_param = "page_size"
+# Changes of the course rows and of the relations rendered in the course lists
+COURSE_LIST_VERSION_FIELDS = ["updated_at", "price__updated_at", "category__updated_at"]
+
+
+def subcategory_representation(node):
+    """
+    Same representation as SubCategorySerializer, for a cached category node.
+    """
+    return {
+        "id": node.id,
+        "name": node.name,
+        "description": node.description,
+        "parent": node.parent_id,
+        "is_active": node.is_active,
+    }
+
+
+class CategoryTreeVersionMixin(ConditionalListMixin):
+    """
+    Category listings are revalidated against the version of the cached tree.
+    """
+
+    def get_version(self, request):
+        return category_tree.get().version
 
+    def get_last_modified(self, request):
+        return category_tree.get().last_modified
 
-class ParentCategoryViewSet(ModelViewSet):
+
+class ParentCategoryViewSet(CategoryTreeVersionMixin, ModelViewSet):
     """
     ViewSet for managing categories. Handles CRUD operations for both
     main categories and subcategories.
@@ -63,8 +102,30 @@ class ParentCategoryViewSet(ModelViewSet):
             return [AllowAny()]
         return [IsAdminUser()]
 
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(self.list_categories, request)
+
+    def list_categories(self, request):
+        """
+        Listing parent categories with their subcategories from the
+        process-local category tree, without querying the database.
+        """
+        data = [
+            {
+                "id": node.id,
+                "name": node.name,
+                "description": node.description,
+                "sub_categories": [
+                    subcategory_representation(child) for child in node.children
+                ],
+                "is_active": node.is_active,
+            }
+            for node in category_tree.get().roots
+        ]
+        return Response(data)
+
 
-class SubCategoryViewSet(ModelViewSet):
+class SubCategoryViewSet(CategoryTreeVersionMixin, ModelViewSet):
     """
     ViewSet for managing subcategories. This only includes categories that
     have a parent (i.e., subcategories).
@@ -81,6 +142,17 @@ class SubCategoryViewSet(ModelViewSet):
             return [AllowAny()]
         return [IsAdminUser()]
 
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(self.list_categories, request)
+
+    def list_categories(self, request):
+        """
+        Listing subcategories from the process-local category tree.
+        """
+        nodes = sorted(category_tree.get().nodes.values(), key=lambda node: node.id)
+        data = [subcategory_representation(node) for node in nodes if node.parent_id]
+        return Response(data)
+
     def perform_create(self, serializer):
         """
         Custom creation logic to ensure the parent category is correctly
@@ -92,6 +164,35 @@ class SubCategoryViewSet(ModelViewSet):
         serializer.save(parent=parent)
 
 
+def category_tree_etag(request, *args, **kwargs):
+    # The shared version changes on every category write
+    return category_tree.get().version
+
+
+def category_tree_last_modified(request, *args, **kwargs):
+    return category_tree.get().last_modified
+
+
+class CategoryTreeView(APIView):
+    """
+    Full category tree (any depth) for the navigation menu.
+    Served from the cached category tree, with ETag and Last-Modified
+    so that clients can revalidate it with a conditional request.
+    """
+
+    permission_classes = [AllowAny]
+
+    @method_decorator(cache_control(no_cache=True))
+    @method_decorator(
+        condition(
+            etag_func=category_tree_etag,
+            last_modified_func=category_tree_last_modified,
+        )
+    )
+    def get(self, request):
+        return Response(category_tree.get().to_nested())
+
+
 class CourseListCreateView(APIView):
     """
     View for creating and listing courses.
@@ -110,9 +211,9 @@ class CourseListCreateView(APIView):
         user = request.user
 
         if user.is_superuser:
-            courses = Course.objects.filter(is_deleted=False)
+            courses = Course.objects.for_listing().filter(is_deleted=False)
         elif user.role == "mentor":
-            courses = Course.objects.filter(mentor=user, is_deleted=False)
+            courses = Course.objects.for_listing().filter(mentor=user, is_deleted=False)
 
         serializer = self.serializer_class(
             courses, many=True, context={"request": request}
@@ -172,7 +273,7 @@ class CourseListCreateView(APIView):
             return Response({"error": str(e)}, status=HTTP_400_BAD_REQUEST)
 
 
-class CourseListView(ListAPIView):
+class CourseListView(UpdatedAtVersionMixin, ListAPIView):
     """
     Public course listing view.
     Only listing approved courses where categories and parent categories are active.
@@ -181,15 +282,19 @@ class CourseListView(ListAPIView):
     permission_classes = [AllowAny]
     serializer_class = CourseListCreateSerializer
     pagination_class = CoursePagination
+    version_fields = COURSE_LIST_VERSION_FIELDS
 
     def get_queryset(self):
-        queryset = Course.objects.filter(status="approved", is_deleted=False)
-
         # Filter out courses whose categories or their ancestors are inactive
-        return [course for course in queryset if course.category.is_active_recursive()]
+        return (
+            Course.objects.approved()
+            .in_active_category()
+            .for_listing()
+            .order_by(*COURSE_LISTING_ORDER)
+        )
 
 
-class AuthenticatedCourseListView(ListAPIView):
+class AuthenticatedCourseListView(UpdatedAtVersionMixin, ListAPIView):
     """
     View accessed only by authenticated student users.
     Filtering the category wchich are active and approved courses.
@@ -198,28 +303,38 @@ class AuthenticatedCourseListView(ListAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = CourseListCreateSerializer
     pagination_class = CoursePagination
+    version_fields = COURSE_LIST_VERSION_FIELDS
 
     def get_queryset(self):
         user = self.request.user
 
+        # Filter out courses whose categories or their ancestors are inactive
+        queryset = Course.objects.approved().in_active_category().for_listing()
+
         # If the user is authenticated, filter out the courses they are enrolled in
         if user.is_authenticated:
-            enrolled_courses_ids = Enrollment.objects.filter(user=user).values_list(
-                "course", flat=True
-            )
+            queryset = queryset.exclude(id__in=enrolled_courses.get(user))
 
-            queryset = Course.objects.filter(
-                status="approved", is_deleted=False
-            ).exclude(id__in=enrolled_courses_ids)
+        # Courses matching the interests of the student first
+        return queryset.order_by_interest(self.get_interest_area_ids())
 
-            return [
-                course for course in queryset if course.category.is_active_recursive()
-            ]
-
-        queryset = Course.objects.filter(status="approved", is_deleted=False)
-
-        # Filter out courses whose categories or their ancestors are inactive
-        return [course for course in queryset if course.category.is_active_recursive()]
+    def get_interest_area_ids(self):
+        if not hasattr(self, "_interest_area_ids"):
+            self._interest_area_ids = sorted(
+                InterestArea.objects.filter(
+                    studentprofile__user=self.request.user
+                ).values_list("id", flat=True)
+            )
+        return self._interest_area_ids
+
+    def get_version(self, request):
+        # The ranking also depends on the course interest vectors and on the
+        # interests of the student, which leave the updated_at columns unchanged
+        return (
+            f"{super().get_version(request)}:"
+            f"{get_resource_version('course_interests')}:"
+            f"{self.get_interest_area_ids()}"
+        )
 
 
 class CourseUpdateView(UpdateAPIView):
@@ -246,22 +361,63 @@ class CourseUpdateView(UpdateAPIView):
         return Course.objects.none()
 
 
+def get_course_detail(request, pk):
+    """
+    Pre-rendered detail page of an approved course, (content, etag).
+    Rendered and cached on a miss, None if the course is not public.
+    """
+    rendered = getattr(request, "_course_detail", None)
+    if rendered is not None:
+        return rendered
+
+    rendered = course_details.get(pk)
+    if rendered is None:
+        course = (
+            Course.objects.filter(is_deleted=False, status="approved", pk=pk)
+            .select_related(
+                "category",
+                "price",
+                "requirements",
+                "suggestions",
+                "mentor__mentorprofile",
+            )
+            .prefetch_related("lessons")
+            .first()
+        )
+        if course is None:
+            return None
+        data = CourseDetailSerializer(course, context={"request": request}).data
+        rendered = course_details.set(pk, data)
+
+    # Shared by the ETag check and the view
+    request._course_detail = rendered
+    return rendered
+
+
+def course_detail_etag(request, pk):
+    rendered = get_course_detail(request, pk)
+    return rendered[1] if rendered else None
+
+
 class CourseDetailView(RetrieveAPIView):
     """
     View only for retrieving the course details.
     For students only.
+    * Served from the pre-rendered JSON kept in the cache, revalidated with its ETag.
     """
 
     permission_classes = [AllowAny]
     serializer_class = CourseDetailSerializer
 
-    def get_object(self):
-        course_id = self.kwargs.get("pk")
+    @method_decorator(cache_control(no_cache=True))
+    @method_decorator(condition(etag_func=course_detail_etag))
+    def get(self, request, pk):
+        rendered = get_course_detail(request, pk)
+        if rendered is None:
+            raise NotFound({"detail": "No Course matches the given query."})
 
-        queryset = Course.objects.filter(is_deleted=False, status="approved")
-        course = get_object_or_404(queryset, pk=course_id)
-
-        return course
+        content, _ = rendered
+        return HttpResponse(content, content_type="application/json")
 
 
 class AdminMentorCourseDetailView(RetrieveAPIView):
@@ -336,25 +492,27 @@ class LessonDetailViewAdminMentorOrPurchasedStudent(RetrieveUpdateAPIView):
         user = self.request.user
         course_id = self.request.query_params.get("course_id")
 
-        try:
-            course = Course.objects.get(id=course_id)
-        except Course.DoesNotExist:
+        # Resolved once per request and reused by the object permission
+        entitlement = get_course_entitlement(user, course_id)
+        if entitlement is None:
             raise NotFound({"detail": "Course not found"})  # Return a 404 response
 
-        if user.is_superuser:
-            return Lesson.objects.filter(course=course)
+        lessons = Lesson.objects.filter(course_id=entitlement.course.pk)
+
+        if entitlement.is_admin:
+            return lessons
 
         elif user.role == "student":
-            if Enrollment.objects.filter(user=user, course=course).exists():
-                return Lesson.objects.filter(course=course)
+            if entitlement.is_enrolled:
+                return lessons
             else:
                 raise PermissionDenied(
                     {"detail": "You have not purchased this course"}
                 )  # Return 403 if not enrolled
 
         elif user.role == "mentor":
-            if course.mentor == user:
-                return Lesson.objects.filter(course=course)
+            if entitlement.is_mentor:
+                return lessons
             else:
                 raise PermissionDenied(
                     {"detail": "You are not permitted to access these lessons"}
@@ -461,7 +619,9 @@ class EnrolledCoursesListView(ListAPIView):
     permission_classes = [IsAuthenticated, IsCoursePurchased]
 
     def get_queryset(self):
-        return Enrollment.objects.filter(user=self.request.user, is_active=True)
+        return Enrollment.objects.filter(
+            user=self.request.user, is_active=True
+        ).select_related("course__mentor", "course__category", "course__price")
 
 
 # class CourseSearchView(ListAPIView):
@@ -486,13 +646,15 @@ class EnrolledCoursesListView(ListAPIView):
 #             return CourseDocument.search().all()
 
 
-class CourseSearchView(ListAPIView):
+class CourseSearchView(UpdatedAtVersionMixin, ListAPIView):
     """
     View for searching the courses according to the keyword fetched from url.
     """
 
     permission_classes = [AllowAny]
     serializer_class = CourseListCreateSerializer
+    pagination_class = CoursePagination
+    version_fields = COURSE_LIST_VERSION_FIELDS
 
     def get_queryset(self):
         query = self.request.query_params.get("q", None)
@@ -501,62 +663,56 @@ class CourseSearchView(ListAPIView):
         if query:
             if user.is_authenticated:
                 if user.role == "admin":
-                    queryset = Course.objects.filter(is_deleted=False).filter(
-                        Q(title__icontains=query)
-                        | Q(description__icontains=query)
-                        | Q(category__name__icontains=query)
-                        | Q(category__description__icontains=query)
-                    )
+                    queryset = Course.objects.filter(is_deleted=False)
 
                 elif user.role == "mentor":
-                    queryset = Course.objects.filter(
-                        mentor=user, is_deleted=False
-                    ).filter(
-                        Q(title__icontains=query)
-                        | Q(description__icontains=query)
-                        | Q(category__name__icontains=query)
-                        | Q(category__description__icontains=query)
-                    )
+                    queryset = Course.objects.filter(mentor=user, is_deleted=False)
                 else:
                     # For student users excluding the enrolled courses.
-                    enrolled_courses_ids = Enrollment.objects.filter(
-                        user=user
-                    ).values_list("course", flat=True)
-
-                    queryset = (
-                        Course.objects.filter(status="approved", is_deleted=False)
-                        .filter(
-                            Q(title__icontains=query)
-                            | Q(description__icontains=query)
-                            | Q(category__name__icontains=query)
-                            | Q(category__description__icontains=query)
-                        )
-                        .exclude(id__in=enrolled_courses_ids)
-                    )
+                    queryset = Course.objects.filter(
+                        status="approved", is_deleted=False
+                    ).exclude(id__in=enrolled_courses.get(user))
+            else:
+                queryset = Course.objects.filter(status="approved", is_deleted=False)
 
-                return [
-                    course
-                    for course in queryset
-                    if course.category.is_active_recursive()
-                ]
-
-            queryset = Course.objects.filter(
-                status="approved", is_deleted=False
-            ).filter(
-                Q(title__icontains=query)
-                | Q(description__icontains=query)
-                | Q(category__name__icontains=query)
-                | Q(category__description__icontains=query)
+            # Matching and ranking is done by the configured search backend
+            return get_search_backend().search(
+                queryset.in_active_category().for_listing(), query
             )
-
-            return [
-                course for course in queryset if course.category.is_active_recursive()
-            ]
         else:
             return Course.objects.none()
 
 
-class CourseCategoryFilterView(ListAPIView):
+class CourseSuggestView(APIView):
+    """
+    Typeahead suggestions for course titles.
+    Returns only ids and titles of the best matching courses, cheap enough
+    to be called on every (debounced) keystroke.
+    """
+
+    permission_classes = [AllowAny]
+    default_limit = 8
+    max_limit = 20
+
+    @method_decorator(cache_control(public=True, max_age=60))
+    def get(self, request):
+        query = request.query_params.get("q", "").strip()
+        try:
+            limit = min(
+                int(request.query_params.get("limit", self.default_limit)),
+                self.max_limit,
+            )
+        except ValueError:
+            limit = self.default_limit
+
+        if len(query) < 2 or limit < 1:
+            return Response([])
+
+        queryset = Course.objects.approved().in_active_category()
+        return Response(get_search_backend().suggest(queryset, query, limit))
+
+
+class CourseCategoryFilterView(UpdatedAtVersionMixin, ListAPIView):
     """
     Filtering courses according to the category.
     Fetching the category name from url.
@@ -564,56 +720,51 @@ class CourseCategoryFilterView(ListAPIView):
 
     permission_classes = [AllowAny]
     serializer_class = CourseListCreateSerializer
+    pagination_class = CoursePagination
+    version_fields = COURSE_LIST_VERSION_FIELDS
 
     def get_queryset(self):
         user = self.request.user
         category_name = self.request.query_params.get("category", None)
 
         if category_name:
-            try:
-                category = Category.objects.get(name=category_name)
-            except Category.DoesNotExist:
-                raise ValueError("Category not found")
-
-            # Get all subcategories recursively
-            def get_subcategories(cat):
-                subcats = list(cat.subcategories.all())
-                for subcat in subcats:
-                    subcats.extend(get_subcategories(subcat))
-                return subcats
+            # Category and subcategories are resolved from the cached tree
+            tree = category_tree.get()
+            category = tree.get_by_name(category_name)
+            if category is None:
+                raise NotFound("Category not found")
 
             # Include the main category and all its subcategories
-            categories = [category] + get_subcategories(category)
+            categories = tree.get_subtree_ids(category.id)
 
             if user.is_authenticated:
                 if user.role == "admin":
                     queryset = Course.objects.filter(
-                        category__in=categories,
+                        category_id__in=categories,
                     )
                 elif user.role == "mentor":
                     queryset = Course.objects.filter(
                         mentor=user,
-                        category__in=categories,
+                        category_id__in=categories,
                     )
                 else:
-                    enrolled_courses_ids = Enrollment.objects.filter(
-                        user=user
-                    ).values_list("course", flat=True)
                     queryset = Course.objects.filter(
                         status="approved",
                         is_deleted=False,
-                        category__in=categories,
-                    ).exclude(id__in=enrolled_courses_ids)
+                        category_id__in=categories,
+                    ).exclude(id__in=enrolled_courses.get(user))
             else:
                 queryset = Course.objects.filter(
                     status="approved",
                     is_deleted=False,
-                    category__in=categories,
+                    category_id__in=categories,
                 )
 
-            return [
-                course for course in queryset if course.category.is_active_recursive()
-            ]
+            return (
+                queryset.in_active_category()
+                .for_listing()
+                .order_by(*COURSE_LISTING_ORDER)
+            )
         else:
             return Course.objects.none()
 
@@ -628,20 +779,56 @@ class PopularCoursesListView(ListAPIView):
     serializer_class = CourseListCreateSerializer
 
     def get_queryset(self):
-        # Filter out courses that are not approved, deleted, or have no enrollments
-        queryset = Course.objects.filter(
-            status="approved", is_deleted=False, enrollments__isnull=False
-        ).distinct()
-
-        # Filter based on active categories by ensuring the category or any ancestor is active
-        queryset = queryset.filter(category__is_active=True)
+        # Visible courses, the ranking itself comes from the cached leaderboard
+        queryset = Course.objects.approved().in_active_category().for_listing()
 
         # Exclude courses that the authenticated user has already purchased
+        purchased = enrolled_courses.get(self.request.user)
+
+        # Top 10 courses by enrollment count
+        return popular_courses.get_top(queryset, 10, exclude=purchased)
+
+
+class RecommendedCoursesListView(ListAPIView):
+    """
+    View for listing the courses recommended to the authenticated user.
+    Courses similar to the ones the user purchased, ranked by their summed
+    precomputed similarity. Falls back to the popular courses for users
+    without enrollments.
+    """
+
+    permission_classes = [IsAuthenticated]
+    serializer_class = CourseListCreateSerializer
+
+    def get_queryset(self):
         user = self.request.user
-        if user.is_authenticated:
-            queryset = queryset.exclude(enrollments__user=user)
+        queryset = Course.objects.approved().in_active_category().for_listing()
+
+        recommended = list(
+            queryset.filter(similar_to__course__enrollments__user=user)
+            .exclude(enrollments__user=user)
+            .annotate(score=Sum("similar_to__score"))
+            .order_by("-score", "-id")[:10]
+        )
+        if recommended:
+            return recommended
+
+        return popular_courses.get_top(queryset, 10, exclude=enrolled_courses.get(user))
+
+
+class TrendingCoursesListView(ListAPIView):
+    """
+    View for listing the trending courses, ranked by their recent activity.
+    The scores are precomputed periodically, fetching the top 10 courses only.
+    """
+
+    permission_classes = [AllowAny]
+    serializer_class = CourseListCreateSerializer
+
+    def get_queryset(self):
+        queryset = Course.objects.approved().in_active_category().for_listing()
+
+        # Exclude courses that the authenticated user has already purchased
+        purchased = enrolled_courses.get(self.request.user)
 
-        # Annotate with enrollment count and order by it in descending order, limiting to top 10
-        return queryset.annotate(total_enrollments=Count("enrollments")).order_by(
-            "-total_enrollments"
-        )[:10]
+        return trending_courses.get_top(queryset, 10, exclude=purchased)
@@ -1,9 +1,10 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
 from django.dispatch import receiver
 from django.db.models.signals import post_save, post_delete
 
-from courses.models import Course
+from courses.mixins import bump_resource_version
+from courses.models import Course, CourseStats
 
 # Create your models here.
 
@@ -45,6 +46,19 @@ class CourseReviewStats(models.Model):
         return f"Stats for {self.course.title}"
 
 
+def update_course_stats_rating(stats):
+    """
+    Copy the rating to the course popularity stats.
+    """
+    CourseStats.objects.update_or_create(
+        course_id=stats.course_id,
+        defaults={
+            "average_rating": stats.average_rating,
+            "total_reviews": stats.total_reviews,
+        },
+    )
+
+
 @receiver(post_save, sender=Review)
 def update_course_review_stats(sender, instance, created, **kwargs):
     """
@@ -63,6 +77,7 @@ def update_course_review_stats(sender, instance, created, **kwargs):
     stats.total_reviews = total_reviews
     stats.average_rating = round(average_rating, 1)  # Keep one decimal place
     stats.save()
+    update_course_stats_rating(stats)
 
 
 @receiver(post_delete, sender=Review)
@@ -86,3 +101,15 @@ def delete_course_review_stats(sender, instance, **kwargs):
     stats.total_reviews = total_reviews
     stats.average_rating = round(average_rating, 1)  # Keep one decimal place
     stats.save()
+    update_course_stats_rating(stats)
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def bump_course_reviews_version(sender, instance, **kwargs):
+    """
+    Change the ETag of the review list of the course once the write is committed.
+    """
+    transaction.on_commit(
+        lambda: bump_resource_version(f"reviews:{instance.course_id}")
+    )
@@ -1,3 +1,48 @@
 from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework.test import APIClient
+
+from courses.mixins import get_course_resource_version
+from courses.models import Course
+from .models import Review
 
 # Create your tests here.
+
+
+class ReviewListConditionalTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.student = get_user_model().objects.create_user(
+            email="student@test.com", password="testpass123", role="student"
+        )
+        self.course = Course.objects.create(
+            title="Django", description="Course", status="approved"
+        )
+
+    def test_reviews_are_revalidated_with_version(self):
+        """Test that an unchanged review list gets a 304 until a review is written"""
+        url = f"/review-list/?course_id={self.course.id}"
+        etag = self.client.get(url)["ETag"]
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Review.objects.create(
+                user=self.student, course=self.course, rating=4, review_text="Good"
+            )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 1)
+
+    def test_invalid_course_id_creates_no_version(self):
+        """Test that only numeric course ids get a cached review list version"""
+        self.assertIsNone(get_course_resource_version("reviews", "random"))
+        self.assertIsNone(cache.get("version:reviews:random"))
+        self.assertEqual(
+            get_course_resource_version("reviews", str(self.course.id)),
+            cache.get(f"version:reviews:{self.course.id}"),
+        )
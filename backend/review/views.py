@@ -5,7 +5,9 @@ from rest_framework.exceptions import NotFound, PermissionDenied
 
 from .serializers import ReviewSerializer, ReviewStatsSerializer
 from .models import Review, CourseReviewStats
-from courses.models import Course, Enrollment
+from courses.enrollment_cache import enrolled_courses
+from courses.mixins import ConditionalListMixin, get_course_resource_version
+from courses.models import Course
 
 # Create your views here.
 
@@ -37,14 +39,14 @@ class ReviewViewSet(ModelViewSet):
             raise NotFound(detail="Course not found")
 
         # Checks wether the user has enrolled the review and fetching the review
-        if Enrollment.objects.filter(user=user, course=course).exists():
+        if enrolled_courses.is_enrolled(user, course.pk):
             return Review.objects.filter(user=user, course=course)
         else:
             # Raising permission denied error if user hasn't enrolled the course.
             raise PermissionDenied(detail="You are not enrolled this course.")
 
 
-class ReviewListView(ListAPIView):
+class ReviewListView(ConditionalListMixin, ListAPIView):
     """
     Listing all reviews except the review by
     the requested user if the user is authenticated.
@@ -55,6 +57,10 @@ class ReviewListView(ListAPIView):
     permission_classes = [AllowAny]
     serializer_class = ReviewSerializer
 
+    def get_version(self, request):
+        course_id = request.query_params.get("course_id")
+        return get_course_resource_version("reviews", course_id)
+
     def get_queryset(self):
         user = self.request.user
         course_id = self.request.query_params.get("course_id")
@@ -65,10 +71,7 @@ class ReviewListView(ListAPIView):
             raise NotFound(detail="Course not found")
 
         # If the user is authenticated and enrolled the course, exclude their reviews
-        if (
-            user.is_authenticated
-            and Enrollment.objects.filter(user=user, course=course).exists()
-        ):
+        if user.is_authenticated and enrolled_courses.is_enrolled(user, course.pk):
             return Review.objects.exclude(user=user).filter(course=course)
 
         # If user is not authenticated, return all reviews for the course
@@ -1,7 +1,7 @@
 from datetime import timedelta
 from django.utils import timezone
 import secrets
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import AbstractUser
 from django.contrib.auth.base_user import BaseUserManager
 from django.utils.translation import gettext_lazy as _
@@ -251,6 +251,21 @@ def save_user_profile_and_wallet(sender, instance, **kwargs):
         logger.error(f"Error saving profiles for user {instance.id}: {str(e)}")
 
 
+@receiver(post_save, sender=CustomUser)
+def revoke_websocket_connections(sender, instance, created, **kwargs):
+    """
+    Close the websocket connections of a user who is blocked or deactivated,
+    once the write is committed.
+    """
+    if created or (instance.is_active and not instance.is_blocked):
+        return
+
+    from chat.revocation import get_user_group_name, revoke_connections
+
+    group_name = get_user_group_name(instance.id)
+    transaction.on_commit(lambda: revoke_connections(group_name))
+
+
 class OTPManager(models.Manager):
     """
     OTP model manager to generate OTP and return.
@@ -16,6 +16,7 @@ const Inbox = () => {
   const [chatProfiles, setChatProfiles] = useState([]); // Holds a list of chat profiles (users available for chat).
   const [receiverProfile, setReceiverProfile] = useState({}); // Stores the profile details of the current receiver.
   const [messages, setMessages] = useState([]);
+  const [olderMessagesUrl, setOlderMessagesUrl] = useState(null); // Link to the page of older messages.
   const [message, setMessage] = useState("");
   const accessToken = useSelector((state) => state.auth.accessToken);
   const websocketRef = useRef(null); // Stores a reference to the WebSocket connection.
@@ -37,6 +38,20 @@ const Inbox = () => {
     scrollToBottom();
   }, [messages]);
 
+  // Function to mark the conversation read up to the message sent at `timestamp`.
+  const sendReadReceipt = (timestamp) => {
+    const websocket = websocketRef.current;
+    const message = JSON.stringify({ type: "read", timestamp });
+
+    if (websocket.readyState === WebSocket.OPEN) {
+      websocket.send(message);
+    } else {
+      websocket.addEventListener("open", () => websocket.send(message), {
+        once: true,
+      });
+    }
+  };
+
   // Effect to manage WebSocket connections and load messages/profile when `receiverId` changes.
   useEffect(() => {
     if (receiverId) {
@@ -59,10 +74,31 @@ const Inbox = () => {
       websocketRef.current.onmessage = function (event) {
         const data = JSON.parse(event.data); // Parse the incoming data as JSON.
 
+        // Read receipt: the other user has read our messages up to `up_to`.
+        if (data.type === "read") {
+          if (data.reader_id === receiverId) {
+            setMessages((prevMessages) =>
+              prevMessages.map((msg) =>
+                msg.sender !== receiverId &&
+                new Date(msg.timestamp) <= new Date(data.up_to)
+                  ? { ...msg, is_read: true }
+                  : msg,
+              ),
+            );
+          }
+          return;
+        }
+
+        // The conversation is open, so messages from the other user are read.
+        if (data.sender_id === receiverId) {
+          sendReadReceipt(data.timestamp);
+        }
+
         // Append the new message to the existing messages array.
         setMessages((prevMessages) => [
           ...prevMessages,
           {
+            uuid: data.uuid, // Generated by the server before the message is written.
             message: data.message,
             sender: data.sender_id,
             receiver: data.receiver_id,
@@ -83,12 +119,25 @@ const Inbox = () => {
         setReceiverProfile(fetchedReceiverProfile); // Update the receiver profile in the state.
       };
 
-      // Function to fetch chat messages between the current user and the receiver.
+      // Function to fetch the latest chat messages between the current user and the receiver.
       const fetchMessages = async () => {
         const fetchedMessages = await getChatListService(receiverId); // API call to get chat messages.
-        setMessages(
-          fetchedMessages?.sort(
-            (a, b) => new Date(a.timestamp) - new Date(b.timestamp), // Sort the messages by timestamp.
+        const sortedMessages = [...(fetchedMessages?.results || [])].sort(
+          (a, b) => new Date(a.timestamp) - new Date(b.timestamp), // Sort the messages by timestamp.
+        );
+        setMessages(sortedMessages);
+        setOlderMessagesUrl(fetchedMessages?.next || null);
+
+        // Mark the conversation read up to the latest message.
+        const latestMessage = sortedMessages[sortedMessages.length - 1];
+        if (latestMessage) {
+          sendReadReceipt(latestMessage.timestamp);
+        }
+        setChatProfiles((prevProfiles) =>
+          prevProfiles.map((profile) =>
+            profile.user_id === receiverId
+              ? { ...profile, unread_count: 0 }
+              : profile,
           ),
         );
       };
@@ -117,6 +166,19 @@ const Inbox = () => {
     fetchChatProfiles();
   }, []);
 
+  // Function to prepend the previous page of the conversation.
+  const handleLoadOlderMessages = async () => {
+    const fetchedMessages = await getChatListService(
+      receiverId,
+      olderMessagesUrl,
+    );
+    if (fetchedMessages) {
+      const olderMessages = [...fetchedMessages.results].reverse(); // Oldest first.
+      setMessages((prevMessages) => [...olderMessages, ...prevMessages]);
+      setOlderMessagesUrl(fetchedMessages.next || null);
+    }
+  };
+
   // Function to handle sending a message.
   const handleSendMessage = async () => {
     if (message.trim() && websocketRef.current) {
@@ -156,6 +218,11 @@ const Inbox = () => {
                 </div>
               )}
               <span className="text-md">{user.full_name}</span>
+              {user.unread_count > 0 && receiverId !== user.user_id && (
+                <span className="ml-auto rounded-full bg-theme-primary px-2 text-xs font-bold text-white">
+                  {user.unread_count}
+                </span>
+              )}
             </li>
           ))}
         </ul>
@@ -190,6 +257,14 @@ const Inbox = () => {
               className="flex-grow overflow-y-auto p-4"
             >
               <div className="mb-4 flex flex-col gap-4">
+                {olderMessagesUrl && (
+                  <button
+                    onClick={handleLoadOlderMessages}
+                    className="self-center text-xs text-gray-500 hover:text-gray-700"
+                  >
+                    Load older messages
+                  </button>
+                )}
                 {messages?.map((msg, index) => {
                   // Convert message timestamp to date and check if it's today's date
                   const messageDate = new Date(msg.timestamp);
@@ -49,36 +49,45 @@ const Courses = () => {
       }
     };
 
-    const fetchCoursesWithCategoryFilter = async () => {
+    const fetchFilteredCourses = async () => {
       setIsLoading(true);
-      const fetchedCoursesWithCategory =
-        await filterCourseWithCategoryService(category);
-      setCourses(fetchedCoursesWithCategory);
+      const fetchedPage = await fetchFilteredPage(1);
+      setCourses(fetchedPage?.results || []);
+      setNoMoreCoursesLeft(!fetchedPage?.next);
       setIsLoading(false);
     };
 
-    const fetchSearchingCourses = async () => {
-      setIsLoading(true);
-      const fetchedSearchingCourses = await searchCourseService(queryParams);
-      setCourses(fetchedSearchingCourses);
-      setIsLoading(false);
-    };
-
-    if (category) {
-      fetchCoursesWithCategoryFilter();
-    } else if (queryParams) {
-      fetchSearchingCourses();
+    setPage(1);
+    setNoMoreCoursesLeft(false);
+    if (category || queryParams) {
+      fetchFilteredCourses();
     } else {
       fetchCourses();
     }
   }, [category, queryParams]);
 
+  // Fetching a page of the courses of the selected category or search query.
+  const fetchFilteredPage = (pageNumber) =>
+    category
+      ? filterCourseWithCategoryService(category, pageNumber)
+      : searchCourseService(queryParams, pageNumber);
+
   const hanldeLoadMoreCourses = async () => {
     setLoadingMore(true);
     const nextPage = page + 1;
     setPage(nextPage);
 
-    const fetchedMoreCourses = await getActiveCourses(setIsLoading, nextPage);
+    let fetchedMoreCourses;
+    if (category || queryParams) {
+      const fetchedPage = await fetchFilteredPage(nextPage);
+      fetchedMoreCourses = fetchedPage?.results;
+      if (!fetchedPage?.next) {
+        setNoMoreCoursesLeft(true);
+      }
+    } else {
+      fetchedMoreCourses = await getActiveCourses(setIsLoading, nextPage);
+    }
+
     if (fetchedMoreCourses) {
       // Filter out any courses already in the list to prevent duplicates
       const newUniqueCourses = fetchedMoreCourses.filter(
@@ -117,7 +126,7 @@ const Courses = () => {
               ))}
           </div>
 
-          {!noMoreCoursesLeft && !category && !queryParams && (
+          {!noMoreCoursesLeft && (
             <div className="flex justify-center">
               <button
                 onClick={hanldeLoadMoreCourses}
@@ -19,6 +19,8 @@ const MentorCourses = () => {
   const [addCourse, setAddCourse] = useState(false);
   const [courses, setCourses] = useState([]);
   const [isLoading, setIsLoading] = useState(false);
+  const [nextPage, setNextPage] = useState(null); // Next page of the filtered courses, null if none.
+  const [loadingMore, setLoadingMore] = useState(false);
   const role = useSelector((state) => state.user.role);
   const navigate = useNavigate();
 
@@ -36,30 +38,39 @@ const MentorCourses = () => {
       setIsLoading(false);
     };
 
-    const fetchCoursesWithCategoryFilter = async () => {
+    const fetchFilteredCourses = async () => {
       setIsLoading(true);
-      const fetchedCoursesWithCategory =
-        await filterCourseWithCategoryService(category);
-      setCourses(fetchedCoursesWithCategory);
+      const fetchedPage = await fetchFilteredPage(1);
+      setCourses(fetchedPage?.results || []);
+      setNextPage(fetchedPage?.next ? 2 : null);
       setIsLoading(false);
     };
 
-    const fetchSearchingCourses = async () => {
-      setIsLoading(true);
-      const fetchedSearchingCourses = await searchCourseService(queryParams);
-      setCourses(fetchedSearchingCourses);
-      setIsLoading(false);
-    };
-
-    if (category) {
-      fetchCoursesWithCategoryFilter();
-    } else if (queryParams) {
-      fetchSearchingCourses();
+    setNextPage(null);
+    if (category || queryParams) {
+      fetchFilteredCourses();
     } else {
       fetchCourses();
     }
   }, [category, queryParams]);
 
+  // Fetching a page of the courses of the selected category or search query.
+  const fetchFilteredPage = (pageNumber) =>
+    category
+      ? filterCourseWithCategoryService(category, pageNumber)
+      : searchCourseService(queryParams, pageNumber);
+
+  // Appending the next page of the filtered courses.
+  const handleLoadMoreCourses = async () => {
+    setLoadingMore(true);
+    const fetchedPage = await fetchFilteredPage(nextPage);
+    if (fetchedPage) {
+      setCourses((prevCourses) => [...prevCourses, ...fetchedPage.results]);
+      setNextPage(fetchedPage.next ? nextPage + 1 : null);
+    }
+    setLoadingMore(false);
+  };
+
   // Refreshing the courses to fetch the newly added couse too.
   const refreshCourses = async () => {
     setIsLoading(true);
@@ -143,6 +154,18 @@ const MentorCourses = () => {
                   ))}
             </div>
           </div>
+
+          {nextPage && (
+            <div className="flex justify-center">
+              <button
+                onClick={handleLoadMoreCourses}
+                disabled={loadingMore}
+                className="mx-auto mt-3 cursor-pointer rounded-xl border border-gray-500 p-1 text-center text-xs font-semibold text-gray-500"
+              >
+                {loadingMore ? "Loading..." : "Load more"}
+              </button>
+            </div>
+          )}
         </div>
       </div>
     </>
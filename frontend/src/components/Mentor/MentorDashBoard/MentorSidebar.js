@@ -10,10 +10,12 @@ import {
   InboxIcon,
 } from "../../../components/common/Icons";
 import { useNavigate, useLocation } from "react-router-dom";
+import { getUnreadCountService } from "../../../services/chatServices/chatServices";
 
 const MentorSidebar = () => {
   const [selected, setSelected] = useState(""); // Default selection
   const [isSidebarOpen, setIsSidebarOpen] = useState(true); // Controls sidebar visibility on smaller screens
+  const [unreadCount, setUnreadCount] = useState(0); // Unread messages badge of the inbox
   const navigate = useNavigate();
   const location = useLocation();
 
@@ -31,6 +33,18 @@ const MentorSidebar = () => {
     }
   }, [location.pathname]);
 
+  useEffect(() => {
+    // Fetch the number of unread messages for the inbox badge
+    const fetchUnreadCount = async () => {
+      const unread = await getUnreadCountService();
+      if (unread) {
+        setUnreadCount(unread.unread_count);
+      }
+    };
+
+    fetchUnreadCount();
+  }, [location.pathname]);
+
   // Handles sidebar item click, updates selected state, and navigates
   const handleClick = (item, url) => {
     setSelected(item);
@@ -97,6 +111,11 @@ const MentorSidebar = () => {
             >
               <InboxIcon isSelected={selected === "inbox"} />
               <a className={`flex items-start px-3 py-2`}>Inbox</a>
+              {unreadCount > 0 && (
+                <span className="ml-auto rounded-full bg-theme-primary px-2 text-xs font-bold text-white">
+                  {unreadCount}
+                </span>
+              )}
             </div>
 
             {/* Reports */}
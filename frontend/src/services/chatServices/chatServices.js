@@ -25,10 +25,12 @@ export const getReceiverProfileService = async (receiverId) => {
   }
 };
 
-export const getChatListService = async (receiverId) => {
+// Returns a page of messages, newest first. Pass the `next` link of the
+// previous page to load older messages.
+export const getChatListService = async (receiverId, next = null) => {
   try {
     const response = await privateAxiosInstance.get(
-      `/messages/?receiverId=${receiverId}`,
+      next || `/messages/?receiverId=${receiverId}`,
     );
 
     if (response.status >= 200 && response.status <= 301) {
@@ -70,3 +72,23 @@ export const getChatProfileService = async () => {
     }
   }
 };
+
+export const getUnreadCountService = async () => {
+  try {
+    const response = await privateAxiosInstance.get(`/unread-count/`);
+
+    if (response.status >= 200 && response.status <= 301) {
+      return response.data;
+    }
+  } catch (error) {
+    if (error.response) {
+      const status = error.response.status;
+
+      if (status >= 500) {
+        toast.error("Internal server error, Please try again later.");
+      }
+    } else if (error.request) {
+      toast.error("Please check your network connection");
+    }
+  }
+};
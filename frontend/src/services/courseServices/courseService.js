@@ -879,12 +879,13 @@ const getEnrolledCourses = async () => {
 /**
  * Sending the selected category to the endpoint to filter the courses based on that
  * @param {string} category - Selected category to filter the courses
- * @returns - Array of filtered courses
+ * @param {number} page - Page of the paginated results
+ * @returns - Page of filtered courses: { count, next, previous, results }
  */
-const filterCourseWithCategoryService = async (category) => {
+const filterCourseWithCategoryService = async (category, page = 1) => {
   try {
     const response = await privateAxiosInstance.get(
-      `/course/category/filter/?category=${category}`,
+      `/course/category/filter/?category=${category}&page=${page}`,
     );
     if (response.status === 200) {
       return response.data;
@@ -931,12 +932,13 @@ const filterCourseWithCategoryService = async (category) => {
 /**
  * Sending the query params to the endpoint to filter courses based on that
  * @param {string} queryParams
- * @returns - Array of filtered courses based on the queryparams.
+ * @param {number} page - Page of the paginated results
+ * @returns - Page of courses matching the queryparams: { count, next, previous, results }
  */
-const searchCourseService = async (queryParams) => {
+const searchCourseService = async (queryParams, page = 1) => {
   try {
     const response = await privateAxiosInstance.get(
-      `/course/search/?q=${queryParams}`,
+      `/course/search/?q=${queryParams}&page=${page}`,
     );
     if (response.status === 200) {
       return response.data;